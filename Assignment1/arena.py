@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1 import constants
+from Assignment1.batch import (
+    BatchGreedyMove,
+    BoolArray,
+    CreatureBatch,
+    IntArray,
+)
+from Assignment1.ecosystem import Census
+from Assignment1.melee import resolve_melee
+from Assignment1.movement_info import MovementInfo
+
+FloatArray = NDArray[np.float64]
+Pairs = tuple[IntArray, IntArray, FloatArray]
+
+
+# Agents are binned into square cells keyed column * rows + row and kept in
+# `order`, sorted by key, with `starts` giving each cell's slice of it. An
+# update only re-bins agents whose cell changed: they are taken out of the
+# sorted order, sorted among themselves and merged back in, and only their
+# cells' counts change, so a tick sorts the agents that crossed a cell border
+# rather than every agent. A query of radius up to `cell` reads the 3x3 block
+# of cells around each point straight from `starts`.
+@dataclass
+class SpatialHash:
+    cell: float
+    columns: int
+    rows: int
+    keys: IntArray = field(init=False, repr=False)
+    present: BoolArray = field(init=False, repr=False)
+    order: IntArray = field(init=False, repr=False)
+    sorted_keys: IntArray = field(init=False, repr=False)
+    counts: IntArray = field(init=False, repr=False)
+    starts: IntArray = field(init=False, repr=False)
+    rebinned: int = field(default=0, init=False)
+
+    @classmethod
+    def covering(cls, width: float, height: float, cell: float) -> SpatialHash:
+        columns, rows = (max(1, int(np.ceil(side / cell))) for side in (width, height))
+        return cls(cell, columns, rows)
+
+    def cells(self, x: FloatArray, y: FloatArray) -> tuple[IntArray, IntArray]:
+        column = np.clip((x // self.cell).astype(np.int64), 0, self.columns - 1)
+        row = np.clip((y // self.cell).astype(np.int64), 0, self.rows - 1)
+        return column, row
+
+    def key(self, x: FloatArray, y: FloatArray) -> IntArray:
+        column, row = self.cells(x, y)
+        return column * self.rows + row
+
+    def build(self, x: FloatArray, y: FloatArray) -> None:
+        self.keys = self.key(x, y)
+        self.present = np.ones(len(x), dtype=bool)
+        self.order = np.argsort(self.keys, kind="stable")
+        self.sorted_keys = self.keys[self.order]
+        self.counts = np.bincount(self.keys, minlength=self.columns * self.rows)
+        self.index()
+
+    def index(self) -> None:
+        self.starts = np.zeros(len(self.counts) + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=self.starts[1:])
+
+    def update(self, x: FloatArray, y: FloatArray) -> None:
+        keys = self.key(x, y)
+        moved = self.present & (keys != self.keys)
+        self.rebinned = int(np.count_nonzero(moved))
+        if not self.rebinned:
+            return
+        np.subtract.at(self.counts, self.keys[moved], 1)
+        np.add.at(self.counts, keys[moved], 1)
+        self.keys[moved] = keys[moved]
+        stay = ~moved[self.order]
+        order, sorted_keys = self.order[stay], self.sorted_keys[stay]
+        agents = np.flatnonzero(moved)
+        agents = agents[np.argsort(keys[agents], kind="stable")]
+        at = np.searchsorted(sorted_keys, keys[agents], side="right")
+        self.order = np.insert(order, at, agents)
+        self.sorted_keys = np.insert(sorted_keys, at, keys[agents])
+        self.index()
+
+    def remove(self, agents: IntArray) -> None:
+        agents = agents[self.present[agents]]
+        self.present[agents] = False
+        np.subtract.at(self.counts, self.keys[agents], 1)
+        stay = self.present[self.order]
+        self.order, self.sorted_keys = self.order[stay], self.sorted_keys[stay]
+        self.index()
+
+    def query(
+        self,
+        px: FloatArray,
+        py: FloatArray,
+        x: FloatArray,
+        y: FloatArray,
+        radius: float,
+    ) -> Pairs:
+        if radius > self.cell:
+            raise ValueError("query radius is larger than the grid cell")
+        column, row = self.cells(px, py)
+        points = np.arange(len(px))
+        queries, keys = [], []
+        for dc in (-1, 0, 1):
+            for dr in (-1, 0, 1):
+                c, r = column + dc, row + dr
+                valid = (c >= 0) & (c < self.columns) & (r >= 0) & (r < self.rows)
+                queries.append(points[valid])
+                keys.append(c[valid] * self.rows + r[valid])
+        query, key = np.concatenate(queries), np.concatenate(keys)
+        start, lengths = self.starts[key], self.counts[key]
+        offsets = np.cumsum(lengths) - lengths
+        slots = np.arange(lengths.sum()) - np.repeat(offsets - start, lengths)
+        query, agent = np.repeat(query, lengths), self.order[slots]
+        dx, dy = x[agent] - px[query], y[agent] - py[query]
+        squared = dx * dx + dy * dy
+        near = squared <= radius * radius
+        return query[near], agent[near], np.sqrt(squared[near])
+
+
+def nearest(pairs: Pairs) -> Pairs:
+    query, agent, distance = pairs
+    if not query.size:
+        return pairs
+    ranked = np.argsort(distance, kind="stable")
+    ranked = ranked[np.argsort(query[ranked], kind="stable")]
+    first = ranked[np.r_[True, query[ranked][1:] != query[ranked][:-1]]]
+    return query[first], agent[first], distance[first]
+
+
+@dataclass
+class Swarm:
+    creatures: CreatureBatch
+    x: FloatArray
+    y: FloatArray
+    heading: FloatArray
+    plan: IntArray
+    alive: BoolArray
+    grid: SpatialHash
+
+    @classmethod
+    def scatter(
+        cls,
+        creatures: CreatureBatch,
+        move: BatchGreedyMove,
+        grid: SpatialHash,
+        width: float,
+        height: float,
+        rng: np.random.Generator,
+    ) -> Swarm:
+        size = len(creatures)
+        creatures.position = np.zeros(size, dtype=np.int64)
+        x, y = rng.uniform(0, width, size), rng.uniform(0, height, size)
+        grid.build(x, y)
+        return cls(
+            creatures,
+            x,
+            y,
+            rng.uniform(-np.pi, np.pi, size),
+            move.body_plan(creatures.legs, creatures.wings),
+            np.ones(size, dtype=bool),
+            grid,
+        )
+
+    def turn(self, agents: IntArray, dx: FloatArray, dy: FloatArray) -> None:
+        self.heading[agents] = np.arctan2(dy, dx)
+
+    def advance(self, move: BatchGreedyMove, width: float, height: float) -> None:
+        before = self.creatures.position.copy()
+        move.move(self.creatures.position, self.creatures.stamina, self.plan)
+        speed = self.creatures.position - before
+        self.x += speed * np.cos(self.heading)
+        self.y += speed * np.sin(self.heading)
+        outside_x = (self.x < 0) | (self.x > width)
+        outside_y = (self.y < 0) | (self.y > height)
+        self.heading[outside_x] = np.pi - self.heading[outside_x]
+        self.heading[outside_y] = -self.heading[outside_y]
+        np.clip(self.x, 0, width, out=self.x)
+        np.clip(self.y, 0, height, out=self.y)
+        self.grid.update(self.x, self.y)
+
+    def kill(self, agents: IntArray) -> None:
+        self.alive[agents] = False
+        self.creatures.stamina[agents] = 0
+        self.grid.remove(agents)
+
+
+# Move speeds come from MOVE_INFO through BatchGreedyMove, which advances each
+# creature's odometer; the distance covered is then laid along its heading.
+# Each tick, predators with stamina turn towards the nearest prey in sight and
+# prey turn away from the nearest predator in sight, both sides move, and
+# every hunting predator lunges at its nearest prey within catch_radius. All
+# the tick's fights are resolved together by resolve_melee, so a prey caught
+# by several predators fights them all, striking the closest first, and the
+# dead leave the arena. All proximity queries go through the prey and
+# predator spatial hashes, whose cells are `sight` wide.
+@dataclass
+class Arena:
+    width: float
+    height: float
+    predators: Swarm
+    prey: Swarm
+    move: BatchGreedyMove
+    catch_radius: float = 1.0
+    sight: float = 20.0
+    ticks: int = 0
+    predator_wins: int = 0
+    prey_wins: int = 0
+    census: list[Census] = field(default_factory=list)
+
+    @classmethod
+    def evolve(
+        cls,
+        predators: int,
+        prey: int,
+        width: float,
+        height: float,
+        rng: np.random.Generator,
+        catch_radius: float = 1.0,
+        sight: float = 20.0,
+    ) -> Arena:
+        move = BatchGreedyMove(
+            MovementInfo(constants.MOVE_INFO), constants.MOVEMENT_ORDER
+        )
+
+        def swarm(size: int) -> Swarm:
+            return Swarm.scatter(
+                CreatureBatch.evolve(size, rng),
+                move,
+                SpatialHash.covering(width, height, max(sight, catch_radius)),
+                width,
+                height,
+                rng,
+            )
+
+        return cls(
+            width, height, swarm(predators), swarm(prey), move, catch_radius, sight
+        )
+
+    def hunters(self) -> IntArray:
+        return np.flatnonzero(
+            self.predators.alive & (self.predators.creatures.stamina > 0)
+        )
+
+    def look(self, seeker: Swarm, agents: IntArray, target: Swarm) -> Pairs:
+        return nearest(
+            target.grid.query(
+                seeker.x[agents], seeker.y[agents], target.x, target.y, self.sight
+            )
+        )
+
+    def steer(self, hunters: IntArray) -> None:
+        predators, prey = self.predators, self.prey
+        query, seen, _ = self.look(predators, hunters, prey)
+        chasers = hunters[query]
+        predators.turn(
+            chasers,
+            prey.x[seen] - predators.x[chasers],
+            prey.y[seen] - predators.y[chasers],
+        )
+        runners = np.flatnonzero(prey.alive)
+        query, seen, _ = self.look(prey, runners, predators)
+        runners = runners[query]
+        prey.turn(
+            runners,
+            prey.x[runners] - predators.x[seen],
+            prey.y[runners] - predators.y[seen],
+        )
+
+    def catches(self, hunters: IntArray) -> tuple[IntArray, IntArray]:
+        predators, prey = self.predators, self.prey
+        query, caught, distance = nearest(
+            prey.grid.query(
+                predators.x[hunters],
+                predators.y[hunters],
+                prey.x,
+                prey.y,
+                self.catch_radius,
+            )
+        )
+        closest = np.argsort(distance, kind="stable")
+        return hunters[query[closest]], caught[closest]
+
+    def engage(self, hunters: IntArray, caught: IntArray) -> None:
+        predators, prey = self.predators.creatures, self.prey.creatures
+        fighters, predator_slot = np.unique(hunters, return_inverse=True)
+        targets, prey_slot = np.unique(caught, return_inverse=True)
+        melee = resolve_melee(
+            predators.health[fighters].tolist(),
+            predators.power[fighters].tolist(),
+            prey.health[targets].tolist(),
+            prey.power[targets].tolist(),
+            list(zip(predator_slot.tolist(), prey_slot.tolist())),
+        )
+        predators.health[fighters] = melee.predator_health
+        prey.health[targets] = melee.prey_health
+        eaten = targets[[death is not None for death in melee.prey_deaths]]
+        killed = fighters[[death is not None for death in melee.predator_deaths]]
+        self.prey.kill(eaten)
+        self.predators.kill(killed)
+        self.predator_wins += len(eaten)
+        self.prey_wins += len(killed)
+
+    def step(self) -> bool:
+        hunters = self.hunters()
+        if not hunters.size or not self.prey.alive.any():
+            return False
+
+        self.steer(hunters)
+        self.predators.advance(self.move, self.width, self.height)
+        self.prey.advance(self.move, self.width, self.height)
+        self.ticks += 1
+
+        self.engage(*self.catches(hunters))
+        self.census.append(
+            Census(
+                self.ticks,
+                int(np.count_nonzero(self.predators.alive)),
+                int(np.count_nonzero(self.prey.alive)),
+                len(hunters),
+            )
+        )
+        return True
+
+    def run(self, max_ticks: int | None = None) -> list[Census]:
+        while max_ticks is None or self.ticks < max_ticks:
+            if not self.step():
+                break
+        return self.census
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Predators and prey in a 2D arena")
+    parser.add_argument("--predators", type=int, default=50_000)
+    parser.add_argument("--prey", type=int, default=50_000)
+    parser.add_argument("--size", type=float, default=5_000.0)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    arena = Arena.evolve(args.predators, args.prey, args.size, args.size, rng)
+    start = time.perf_counter()
+    census = arena.run(args.ticks)
+    elapsed = time.perf_counter() - start
+    print("Ticks: " + str(arena.ticks))
+    print("Predator wins: " + str(arena.predator_wins))
+    print("Prey wins: " + str(arena.prey_wins))
+    if census:
+        print(
+            "Survivors: "
+            + str(census[-1].predators)
+            + " predators, "
+            + str(census[-1].prey)
+            + " prey"
+        )
+    print("Seconds per tick: " + format(elapsed / max(arena.ticks, 1), ".4f"))
+
+
+def brute_force(
+    px: FloatArray, py: FloatArray, x: FloatArray, y: FloatArray, radius: float
+) -> set[tuple[int, int]]:
+    distance = np.hypot(px[:, None] - x[None, :], py[:, None] - y[None, :])
+    return set(zip(*(index.tolist() for index in np.nonzero(distance <= radius))))
+
+
+def test_query_matches_all_pairs_after_updates():
+    rng = np.random.default_rng(1)
+    x, y = rng.uniform(0, 100, 2_000), rng.uniform(0, 60, 2_000)
+    grid = SpatialHash.covering(100, 60, 7)
+    grid.build(x, y)
+    removed = rng.choice(2_000, 300, replace=False)
+    grid.remove(removed)
+    alive = np.ones(2_000, dtype=bool)
+    alive[removed] = False
+
+    for _ in range(5):
+        x = np.clip(x + rng.normal(0, 3, 2_000), 0, 100)
+        y = np.clip(y + rng.normal(0, 3, 2_000), 0, 60)
+        grid.update(x, y)
+        px, py = rng.uniform(0, 100, 200), rng.uniform(0, 60, 200)
+        query, agent, _ = grid.query(px, py, x, y, 7)
+
+        expected = {pair for pair in brute_force(px, py, x, y, 7) if alive[pair[1]]}
+        assert set(zip(query.tolist(), agent.tolist())) == expected
+        assert 0 < grid.rebinned < alive.sum()
+
+    fresh = SpatialHash.covering(100, 60, 7)
+    fresh.build(x[alive], y[alive])
+    assert grid.sorted_keys.tolist() == fresh.sorted_keys.tolist()
+
+
+def test_each_hunter_lunges_once_within_reach():
+    rng = np.random.default_rng(2)
+    arena = Arena.evolve(3_000, 3_000, 300, 300, rng, catch_radius=3, sight=10)
+    for _ in range(5):
+        hunters = arena.hunters()
+        arena.steer(hunters)
+        arena.predators.advance(arena.move, arena.width, arena.height)
+        arena.prey.advance(arena.move, arena.width, arena.height)
+        predators, caught = arena.catches(hunters)
+
+        reach = brute_force(
+            arena.predators.x[hunters],
+            arena.predators.y[hunters],
+            arena.prey.x,
+            arena.prey.y,
+            3,
+        )
+        reached = {prey for _, prey in reach if arena.prey.alive[prey]}
+        assert len(set(predators.tolist())) == len(predators) == len(caught)
+        assert len(set(caught.tolist())) < len(caught)
+        assert set(caught.tolist()) <= reached
+        assert caught.size and arena.prey.alive[caught].all()
+        arena.engage(predators, caught)
+
+
+def test_creatures_move_at_move_info_speeds():
+    arena = Arena.evolve(10, 500, 1e4, 1e4, np.random.default_rng(3), sight=100)
+    prey = arena.prey
+    x, y = prey.x.copy(), prey.y.copy()
+    inside = (np.minimum(x, y) > 100) & (np.maximum(x, y) < 1e4 - 100)
+
+    speeds = set()
+    for _ in range(10):
+        before = prey.creatures.position.copy()
+        prey.advance(arena.move, arena.width, arena.height)
+        speeds |= set((prey.creatures.position - before).tolist())
+
+    odometer = prey.creatures.position
+    travelled = np.hypot(prey.x - x, prey.y - y)
+    assert np.allclose(travelled[inside], odometer[inside]) and inside.sum() > 450
+    assert speeds == {speed for _, _, speed, _, _ in constants.MOVE_INFO.values()}
+
+
+def test_arena_settles_fights():
+    arena = Arena.evolve(2_000, 2_000, 200, 200, np.random.default_rng(4))
+
+    census = arena.run()
+
+    assert 2_000 - census[-1].prey == arena.predator_wins > 0
+    assert 2_000 - census[-1].predators == arena.prey_wins
+    assert all(a.prey >= b.prey for a, b in zip(census, census[1:]))
+    assert (arena.predators.creatures.health[arena.predators.alive] > 0).all()
+
+
+if __name__ == "__main__":
+    main()
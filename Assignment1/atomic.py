@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+
+# Writes go to a sibling temporary file that is synced and then renamed over
+# path, so readers and crashes only ever see the old file or the whole new
+# one. Each write gets its own temporary file, so concurrent writers to the
+# same path never share one, and a failed write removes only its own.
+@contextmanager
+def atomic_write(path: Path) -> Iterator[BinaryIO]:
+    descriptor, name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    temporary = Path(name)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    finally:
+        temporary.unlink(missing_ok=True)
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / "result.pickle"
+    path.write_bytes(b"old")
+
+    with atomic_write(path) as file:
+        pickle.dump([1, 2], file)
+
+    assert pickle.loads(path.read_bytes()) == [1, 2]
+    assert [p.name for p in tmp_path.iterdir()] == ["result.pickle"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / "plan.v1.json"
+    path.write_bytes(b"old")
+
+    try:
+        with atomic_write(path) as file:
+            file.write(b"partial")
+            raise OSError("disk full")
+    except OSError:
+        pass
+
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["plan.v1.json"]
+
+
+def test_overlapping_writers_keep_their_own_files(tmp_path):
+    path = tmp_path / "table.npy"
+
+    with atomic_write(path) as first:
+        first.write(b"first")
+        with atomic_write(path) as second:
+            second.write(b"second")
+        assert path.read_bytes() == b"second"
+        first.write(b" done")
+
+    assert path.read_bytes() == b"first done"
+    assert [p.name for p in tmp_path.iterdir()] == ["table.npy"]
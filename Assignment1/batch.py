@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields
+from random import Random
+from typing import Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1 import constants
+from Assignment1.characteristics import Legs, Position, Stamina, TraitGenerator, Wings
+from Assignment1.chase import Chase
+from Assignment1.creature import Creature, Predator, Prey, random_creature
+from Assignment1.fight import Fight, strikes_to_kill
+from Assignment1.move import GreedyMove
+from Assignment1.movement_info import MovementInfo
+
+IntArray = NDArray[np.int64]
+BoolArray = NDArray[np.bool_]
+
+
+def lookup_table(table: dict[int, int]) -> IntArray:
+    array = np.zeros(max(table) + 1, dtype=np.int64)
+    for key, value in table.items():
+        array[key] = value
+    return array
+
+
+def attack_power(base: IntArray, claws: IntArray, teeth: IntArray) -> IntArray:
+    multiplier = lookup_table(constants.CLAWS_POWER_MULTIPLIER)
+    boost = lookup_table(constants.TEETH_POWER_BOOST)
+    return base * multiplier[claws] + boost[teeth]
+
+
+def evolved_power(claws: IntArray, teeth: IntArray) -> IntArray:
+    initial = attack_power(
+        np.full_like(claws, constants.DEFAULT_POWER),
+        np.full_like(claws, constants.DEFAULT_CLAW_LEVEL),
+        np.full_like(teeth, constants.DEFAULT_TEETH_SHARPNESS),
+    )
+    return attack_power(initial, claws, teeth)
+
+
+@dataclass
+class CreatureBatch:
+    position: IntArray
+    stamina: IntArray
+    legs: IntArray
+    wings: IntArray
+    claws: IntArray
+    teeth: IntArray
+    health: IntArray
+    power: IntArray
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    def take(self, index: IntArray) -> CreatureBatch:
+        return CreatureBatch(*(getattr(self, f.name)[index] for f in fields(self)))
+
+    @classmethod
+    def from_creatures(cls, creatures: Sequence[Creature]) -> CreatureBatch:
+        def column(values: list[int]) -> IntArray:
+            return np.array(values, dtype=np.int64)
+
+        return cls(
+            column([c.get_position() for c in creatures]),
+            column([c.get_stamina() for c in creatures]),
+            column([c.get_num_legs() for c in creatures]),
+            column([c.get_num_wings() for c in creatures]),
+            column([c.get_claws() for c in creatures]),
+            column([c.get_teeth_sharpness() for c in creatures]),
+            column([c.get_health() for c in creatures]),
+            column([c.get_attack_power() for c in creatures]),
+        )
+
+    @classmethod
+    def evolve(
+        cls,
+        size: int,
+        rng: np.random.Generator,
+        min_pos: int | None = None,
+        max_pos: int | None = None,
+    ) -> CreatureBatch:
+        traits = TraitGenerator(rng)
+        position = traits.generate_position(
+            size,
+            constants.MIN_POS if min_pos is None else min_pos,
+            constants.MAX_POS if max_pos is None else max_pos,
+        )
+        stamina = traits.generate_stamina(size)
+        legs = traits.evolve_legs(size)
+        wings = traits.evolve_wings(size)
+        claws = traits.evolve_claws(size)
+        teeth = traits.evolve_teeth(size)
+        health = traits.generate_health(size)
+        power = evolved_power(claws, teeth)
+        return cls(position, stamina, legs, wings, claws, teeth, health, power)
+
+
+@dataclass
+class BatchGreedyMove:
+    info: MovementInfo
+    greedy_order: list[str] = field(default_factory=list)
+    table: IntArray = field(init=False, repr=False)
+    stamina_use: IntArray = field(init=False, repr=False)
+    speed: IntArray = field(init=False, repr=False)
+    max_legs: int = field(init=False, repr=False)
+    max_wings: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        movements = [m for m in self.greedy_order if m in constants.MOVEMENT_ORDER]
+        info = self.info
+        self.max_legs = max(map(info.get_num_legs_required, movements), default=0)
+        self.max_wings = max(map(info.get_num_wing_required, movements), default=0)
+        max_stamina = max(map(info.get_required_stamina, movements), default=0)
+        self.stamina_use = np.array(
+            [info.get_stamina_use(m) for m in movements] + [0], dtype=np.int64
+        )
+        self.speed = np.array(
+            [info.get_speed(m) for m in movements] + [0], dtype=np.int64
+        )
+        self.table = np.array(
+            [
+                [
+                    self.select(movements, legs, wings, stamina)
+                    for stamina in range(-1, max_stamina + 1)
+                ]
+                for legs in range(self.max_legs + 1)
+                for wings in range(self.max_wings + 1)
+            ],
+            dtype=np.int64,
+        )
+
+    def select(self, movements: list[str], legs: int, wings: int, stamina: int) -> int:
+        movement = self.info.select_movement(movements, stamina, legs, wings)
+        return len(movements) if movement is None else movements.index(movement)
+
+    def body_plan(self, legs: IntArray, wings: IntArray) -> IntArray:
+        plan = np.minimum(legs, self.max_legs) * (self.max_wings + 1)
+        plan += np.minimum(wings, self.max_wings)
+        offset: IntArray = plan * self.table.shape[1]
+        return offset
+
+    def move(self, position: IntArray, stamina: IntArray, plan: IntArray) -> None:
+        column = np.clip(stamina + 1, 0, self.table.shape[1] - 1)
+        chosen = self.table.ravel()[plan + column]
+        stamina -= self.stamina_use[chosen]
+        position += self.speed[chosen]
+
+
+@dataclass
+class BatchOutcome:
+    caught: BoolArray
+    ticks: IntArray
+    predator_won: BoolArray
+    distance: IntArray
+
+    def __len__(self) -> int:
+        return len(self.caught)
+
+    def message(self, i: int) -> str:
+        if self.predator_won[i]:
+            return constants.PREDATOR_WIN_MESSAGE
+        return constants.PREY_WIN_MESSAGE
+
+    def messages(self) -> list[str]:
+        return [self.message(i) for i in range(len(self))]
+
+
+@dataclass
+class _ChaseState:
+    rows: IntArray
+    live: BoolArray
+    predator_position: IntArray
+    predator_stamina: IntArray
+    predator_plan: IntArray
+    prey_position: IntArray
+    prey_stamina: IntArray
+    prey_plan: IntArray
+
+    def finish(self, mask: BoolArray) -> IntArray:
+        self.live &= ~mask
+        return self.rows[mask]
+
+    def compact(self) -> None:
+        if 2 * np.count_nonzero(self.live) >= len(self.rows):
+            return
+        live = self.live
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name)[live])
+
+
+@dataclass
+class BatchChase:
+    predators: CreatureBatch
+    prey: CreatureBatch
+    predator_move: BatchGreedyMove
+    prey_move: BatchGreedyMove
+
+    def chase(self) -> BatchOutcome:
+        caught = np.zeros(len(self.predators), dtype=bool)
+        ticks = np.zeros(len(self.predators), dtype=np.int64)
+        position = self.predators.position.copy()
+        state = self.initial_state()
+        tick = 0
+
+        def finish(mask: BoolArray) -> IntArray:
+            rows = state.finish(mask)
+            ticks[rows] = tick
+            position[rows] = state.predator_position[mask]
+            return rows
+
+        while state.rows.size:
+            finish(state.live & (state.predator_stamina <= 0))
+            tick += 1
+            self.predator_move.move(
+                state.predator_position, state.predator_stamina, state.predator_plan
+            )
+            self.prey_move.move(
+                state.prey_position, state.prey_stamina, state.prey_plan
+            )
+            caught[
+                finish(state.live & (state.predator_position >= state.prey_position))
+            ] = True
+            state.compact()
+
+        distance = position - self.predators.position
+        return BatchOutcome(caught, ticks, caught & self.fight(caught), distance)
+
+    def initial_state(self) -> _ChaseState:
+        predators, prey = self.predators, self.prey
+        return _ChaseState(
+            np.arange(len(predators)),
+            np.ones(len(predators), dtype=bool),
+            predators.position.copy(),
+            predators.stamina.copy(),
+            self.predator_move.body_plan(predators.legs, predators.wings),
+            prey.position.copy(),
+            prey.stamina.copy(),
+            self.prey_move.body_plan(prey.legs, prey.wings),
+        )
+
+    def fight(self, engaged: BoolArray) -> BoolArray:
+        predator_won, _ = resolve_fights(
+            self.predators.health,
+            self.predators.power,
+            self.prey.health,
+            self.prey.power,
+        )
+        return engaged & predator_won
+
+
+def resolve_fights(
+    predator_health: IntArray,
+    predator_power: IntArray,
+    prey_health: IntArray,
+    prey_power: IntArray,
+) -> tuple[BoolArray, IntArray]:
+    predator_rounds = np.maximum(1, strikes_to_kill(prey_health, predator_power))
+    prey_rounds = strikes_to_kill(predator_health, prey_power)
+    predator_won = predator_rounds <= prey_rounds
+    return predator_won, np.where(predator_won, predator_rounds, prey_rounds)
+
+
+def evolve_matchups(
+    size: int, rng: np.random.Generator
+) -> tuple[CreatureBatch, CreatureBatch]:
+    predators = CreatureBatch.evolve(size, rng, 0, 0)
+    prey = CreatureBatch.evolve(size, rng, constants.MIN_POS, constants.MAX_POS)
+    return predators, prey
+
+
+def greedy_batch_chase(predators: CreatureBatch, prey: CreatureBatch) -> BatchChase:
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+    return BatchChase(
+        predators, prey, BatchGreedyMove(info, order), BatchGreedyMove(info, order)
+    )
+
+
+def test_batch_matches_chase():
+    rng = Random(7)
+    predators = [random_creature(Predator, rng, 0) for _ in range(60)]
+    prey = [
+        random_creature(Prey, rng, rng.randint(0, 120)) for _ in range(len(predators))
+    ]
+    outcome = greedy_batch_chase(
+        CreatureBatch.from_creatures(predators), CreatureBatch.from_creatures(prey)
+    ).chase()
+
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+    expected = [
+        Chase(p, q, GreedyMove(info, p, order), GreedyMove(info, q, order)).chase()
+        for p, q in zip(predators, prey)
+    ]
+
+    assert outcome.messages() == expected
+
+
+def test_batch_chase_predator_caught_prey():
+    predator = Predator(Position(0), Stamina(25), Legs(2), Wings(2))
+    prey = Prey(Position(5), Stamina(15), Legs(1), Wings(0))
+
+    outcome = greedy_batch_chase(
+        CreatureBatch.from_creatures([predator]), CreatureBatch.from_creatures([prey])
+    ).chase()
+
+    assert outcome.caught[0] and outcome.ticks[0] == 3
+    assert outcome.distance[0] == 9
+
+
+def test_batch_chase_prey_ran_into_infinity():
+    predator = Predator(Position(0), Stamina(15), Legs(1), Wings(1))
+    prey = Prey(Position(3), Stamina(25), Legs(1), Wings(2))
+
+    outcome = greedy_batch_chase(
+        CreatureBatch.from_creatures([predator]), CreatureBatch.from_creatures([prey])
+    ).chase()
+
+    assert not outcome.caught[0] and outcome.ticks[0] == 15
+    assert outcome.distance[0] == 15
+    assert outcome.message(0) == constants.PREY_WIN_MESSAGE
+
+
+def test_evolve_matchups_respects_bounds():
+    predators, prey = evolve_matchups(500, np.random.default_rng(3))
+
+    assert (predators.position == 0).all()
+    assert prey.position.min() >= constants.MIN_POS
+    assert prey.position.max() <= constants.MAX_POS
+    assert predators.stamina.min() >= constants.MIN_STAMINA
+    assert predators.wings.max() <= constants.MAX_WINGS
+
+
+def test_evolved_power_matches_creature():
+    creature = Creature()
+    creature.evolve()
+
+    power = evolved_power(
+        np.array([creature.get_claws()]), np.array([creature.get_teeth_sharpness()])
+    )
+
+    assert power[0] == creature.get_attack_power()
+
+
+def test_resolve_fights_matches_fight():
+    rng = Random(9)
+    prey = [random_creature(Prey, rng, 5) for _ in range(200)]
+    predators = [random_creature(Predator, rng, 5) for _ in range(len(prey))]
+    prey_batch = CreatureBatch.from_creatures(prey)
+    predator_batch = CreatureBatch.from_creatures(predators)
+
+    predator_won, rounds = resolve_fights(
+        predator_batch.health, predator_batch.power, prey_batch.health, prey_batch.power
+    )
+
+    results = [Fight(q, p).resolve() for q, p in zip(prey, predators)]
+    assert [r.rounds for r in results] == rounds.tolist()
+    assert [
+        r.message == constants.PREDATOR_WIN_MESSAGE for r in results
+    ] == predator_won.tolist()
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from time import perf_counter
+from typing import Callable
+
+from Assignment1 import constants
+from Assignment1.characteristics import Legs, Position, Stamina, Wings
+from Assignment1.chase import Chase
+from Assignment1.creature import (
+    Creature,
+    CreatureInterface,
+    FlatCreature,
+    FlatPredator,
+    FlatPrey,
+    Genome,
+    Predator,
+    Prey,
+)
+from Assignment1.events import CONSOLE, EventSink, NullSink
+from Assignment1.fight import Fight
+from Assignment1.move import GreedyMove, MoveInterface, RandomMove
+from Assignment1.movement_info import MovementInfo
+
+CreatureFactory = Callable[[int], CreatureInterface]
+MoveFactory = Callable[[MovementInfo, CreatureInterface, random.Random], MoveInterface]
+
+LAYOUTS: dict[str, CreatureFactory] = {
+    "nested": lambda stamina: Creature(
+        Position(0), Stamina(stamina), Legs(2), Wings(2)
+    ),
+    "flat": lambda stamina: FlatCreature(0, stamina, 2, 2),
+}
+
+STRATEGIES: dict[str, MoveFactory] = {
+    "greedy": lambda info, creature, rng: GreedyMove(
+        info, creature, constants.MOVEMENT_ORDER
+    ),
+    "random": lambda info, creature, rng: RandomMove(
+        info, creature, constants.MOVEMENT_ORDER, rng=rng
+    ),
+}
+
+STAMINA_RANGES = {
+    "low": (constants.MIN_STAMINA, 200),
+    "high": (1000, constants.MAX_STAMINA),
+}
+
+METADATA = ("seed", "count")
+
+SINKS: dict[str, Callable[[], EventSink]] = {
+    "silent": NullSink,
+    "print": lambda: CONSOLE,
+}
+
+
+Matchup = tuple[Genome, Genome]
+
+
+def genome_set(seed: int, count: int, stamina: tuple[int, int]) -> list[Matchup]:
+    rng = random.Random(seed)
+    return [
+        (
+            Genome.random(rng, 0, stamina),
+            Genome.random(
+                rng, rng.randint(constants.MIN_POS, constants.MAX_POS), stamina
+            ),
+        )
+        for _ in range(count)
+    ]
+
+
+def rate(count: int, run: Callable[[], object]) -> float:
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = perf_counter()
+        run()
+        return count / (perf_counter() - start)
+
+
+def chases_per_second(
+    matchups: list[Matchup], strategy: MoveFactory, sink: EventSink, seed: int = 0
+) -> float:
+    info, rng = MovementInfo(constants.MOVE_INFO), random.Random(seed)
+    chases = []
+    for predator_genome, prey_genome in matchups:
+        predator = predator_genome.creature(Predator, sink)
+        prey = prey_genome.creature(Prey, sink)
+        chases.append(
+            Chase(
+                predator,
+                prey,
+                strategy(info, predator, rng),
+                strategy(info, prey, rng),
+                sink,
+            )
+        )
+    return rate(len(chases), lambda: [chase.chase() for chase in chases])
+
+
+def fights_per_second(matchups: list[Matchup], sink: EventSink) -> float:
+    fights = [
+        Fight(prey.creature(Prey, sink), predator.creature(Predator, sink), sink=sink)
+        for predator, prey in matchups
+    ]
+    return rate(len(fights), lambda: [fight.fight() for fight in fights])
+
+
+def constructions_per_second(matchups: list[Matchup]) -> float:
+    sink = NullSink()
+    return rate(
+        len(matchups), lambda: [prey.creature(Prey, sink) for _, prey in matchups]
+    )
+
+
+def flat_constructions_per_second(matchups: list[Matchup]) -> float:
+    return rate(
+        len(matchups),
+        lambda: [
+            FlatPrey(g.position, g.stamina, g.legs, g.wings, g.claws, g.teeth, g.health)
+            for _, g in matchups
+        ],
+    )
+
+
+def evolutions_per_second(count: int, seed: int) -> float:
+    rng, sink = random.Random(seed), NullSink()
+    predators = [FlatPredator(sink=sink) for _ in range(count)]
+
+    def evolve() -> None:
+        for predator in predators:
+            predator.evolve(rng)
+
+    return rate(count, evolve)
+
+
+def bytes_per_creature(factory: CreatureFactory, count: int = 100_000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    creatures = [factory(constants.MAX_STAMINA) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(creatures)
+
+
+def ticks_per_second(factory: CreatureFactory, ticks: int = 200_000) -> float:
+    creature = factory(10 * ticks)
+    move = GreedyMove(
+        MovementInfo(constants.MOVE_INFO), creature, constants.MOVEMENT_ORDER
+    )
+    return rate(ticks, lambda: [move.move() for _ in range(ticks)])
+
+
+def compare_layouts(count: int = 100_000) -> dict[str, float]:
+    results = {}
+    for name, factory in LAYOUTS.items():
+        results["bytes_per_creature." + name] = bytes_per_creature(factory, count)
+        results["ticks_per_second." + name] = ticks_per_second(factory, 2 * count)
+    return results
+
+
+def run_suite(seed: int = 0, count: int = 2_000) -> dict[str, float]:
+    results = {}
+    for range_name, stamina in STAMINA_RANGES.items():
+        matchups = genome_set(seed, count, stamina)
+        for sink_name, sink in SINKS.items():
+            for strategy_name, strategy in STRATEGIES.items():
+                key = ".".join(["chases", strategy_name, range_name, sink_name])
+                results[key] = chases_per_second(matchups, strategy, sink(), seed)
+            key = ".".join(["fights", range_name, sink_name])
+            results[key] = fights_per_second(matchups, sink())
+        results["constructions.nested." + range_name] = constructions_per_second(
+            matchups
+        )
+        results["constructions.flat." + range_name] = flat_constructions_per_second(
+            matchups
+        )
+    results["evolutions.flat"] = evolutions_per_second(count, seed)
+    results.update(compare_layouts(10 * count))
+    return results
+
+
+def regressions(
+    baseline: dict[str, float], current: dict[str, float], tolerance: float
+) -> list[str]:
+    differing = [key for key in METADATA if baseline.get(key) != current.get(key)]
+    if differing:
+        raise ValueError("baseline differs in " + ", ".join(differing))
+    slower = []
+    for key, value in baseline.items():
+        if key in METADATA or key not in current:
+            continue
+        if key.startswith("bytes_per_creature"):
+            continue
+        if current[key] < value * (1 - tolerance):
+            slower.append(key + ": " + format(current[key] / value, ".2f") + "x")
+    return slower
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(description="Predator and prey engine benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=2_000)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = {"seed": args.seed, "count": args.count}
+    results.update(run_suite(args.seed, args.count))
+    report = json.dumps(results, indent=2, sort_keys=True)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(report + "\n")
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    try:
+        slower = regressions(baseline, results, args.tolerance)
+    except ValueError as error:
+        parser.error(str(error))
+    for line in slower:
+        print("Regression: " + line)
+    return 1 if slower else 0
+
+
+def test_flat_layout_is_smaller():
+    nested = bytes_per_creature(LAYOUTS["nested"], 1_000)
+    flat = bytes_per_creature(LAYOUTS["flat"], 1_000)
+
+    assert flat < nested / 3
+
+
+def test_genome_set_is_fixed_by_seed():
+    assert genome_set(4, 10, STAMINA_RANGES["low"]) == genome_set(
+        4, 10, STAMINA_RANGES["low"]
+    )
+
+
+def test_run_suite_covers_every_scenario():
+    results = run_suite(count=5)
+
+    assert "chases.random.high.print" in results
+    assert "fights.low.silent" in results
+    assert "constructions.flat.low" in results
+    assert all(value > 0 for value in results.values())
+
+
+def test_regressions():
+    settings = {"seed": 0, "count": 100}
+    baseline = {"chases.greedy.low.silent": 100.0, "fights.low.silent": 50.0}
+    current = {"chases.greedy.low.silent": 70.0, "fights.low.silent": 49.0}
+    baseline.update(settings)
+    current.update(settings)
+
+    assert regressions(baseline, current, 0.2) == ["chases.greedy.low.silent: 0.70x"]
+
+
+def test_regressions_refuse_other_settings():
+    baseline = {"seed": 0, "count": 100, "fights.low.silent": 50.0}
+
+    try:
+        regressions(baseline, dict(baseline, count=200), 0.2)
+    except ValueError as error:
+        assert "count" in str(error)
+        return
+    assert False
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import dataclass, field
+from random import Random
+from typing import Generic, Hashable, TypeVar
+
+from Assignment1 import constants
+from Assignment1.chase import Chase, finish
+from Assignment1.creature import CreatureInterface
+from Assignment1.events import BufferedSink, FightWon, NullSink
+from Assignment1.fight import Fight
+from Assignment1.move import GreedyMove
+from Assignment1.resolver import greedy_pair, random_pair
+
+V = TypeVar("V")
+
+
+@dataclass
+class LRUCache(Generic[V]):
+    capacity: int = 65_536
+    entries: OrderedDict[Hashable, V] = field(default_factory=OrderedDict)
+    hits: int = 0
+    misses: int = 0
+
+    def get(self, key: Hashable) -> V | None:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(frozen=True)
+class ChaseOutcome:
+    caught: bool
+    predator_distance: int
+    prey_distance: int
+    predator_stamina_used: int
+    prey_stamina_used: int
+
+
+@dataclass(frozen=True)
+class FightOutcome:
+    message: str
+    prey_damage: int
+    predator_damage: int
+
+
+# A cache assumes every chase it sees uses the same movement table; the greedy
+# orders are part of the key, the MovementInfo is not.
+@dataclass
+class OutcomeCache:
+    chases: LRUCache[ChaseOutcome] = field(default_factory=LRUCache)
+    fights: LRUCache[FightOutcome] = field(default_factory=LRUCache)
+
+    @classmethod
+    def bounded(cls, capacity: int) -> OutcomeCache:
+        return cls(LRUCache(capacity), LRUCache(capacity))
+
+
+def body(move: GreedyMove) -> tuple[int, int, int, tuple[str, ...]]:
+    creature = move.creature
+    return (
+        creature.get_stamina(),
+        creature.get_num_legs(),
+        creature.get_num_wings(),
+        tuple(move.greedy_order),
+    )
+
+
+@dataclass
+class CachedChase(Chase):
+    cache: OutcomeCache = field(default_factory=OutcomeCache, repr=False)
+
+    def chase(self) -> str:
+        predator_move, prey_move = self.predator_move, self.prey_move
+        if (
+            self.sink.records_moves
+            or self.recorder is not None
+            or not isinstance(predator_move, GreedyMove)
+            or not isinstance(prey_move, GreedyMove)
+        ):
+            return super().chase()
+
+        gap = self.prey.get_position() - self.predator.get_position()
+        key = (body(predator_move), body(prey_move), gap)
+        outcome = self.cache.chases.get(key)
+        if outcome is None:
+            outcome = self.simulate()
+            self.cache.chases.put(key, outcome)
+        else:
+            self.predator.increment_position(outcome.predator_distance)
+            self.prey.increment_position(outcome.prey_distance)
+            self.predator.use_stamina(outcome.predator_stamina_used)
+            self.prey.use_stamina(outcome.prey_stamina_used)
+        return self.engage() if outcome.caught else self.escape()
+
+    def simulate(self) -> ChaseOutcome:
+        predator, prey = self.predator, self.prey
+        start = (predator.get_position(), prey.get_position())
+        stamina = (predator.get_stamina(), prey.get_stamina())
+        return ChaseOutcome(
+            finish(self.ticks()),
+            predator.get_position() - start[0],
+            prey.get_position() - start[1],
+            stamina[0] - predator.get_stamina(),
+            stamina[1] - prey.get_stamina(),
+        )
+
+    def new_fight(self) -> Fight:
+        return CachedFight(self.prey, self.predator, sink=self.sink, cache=self.cache)
+
+
+def fighter(creature: CreatureInterface) -> tuple[int, int]:
+    return creature.get_attack_power(), creature.get_health()
+
+
+@dataclass
+class CachedFight(Fight):
+    cache: OutcomeCache = field(default_factory=OutcomeCache, repr=False)
+
+    def fight(self) -> str:
+        prey, predator = self.prey, self.predator
+        key = (fighter(prey), fighter(predator))
+        outcome = self.cache.fights.get(key)
+        if outcome is None:
+            message = (
+                self.resolve().message if self.instant else self.exchange_attacks()
+            )
+            outcome = FightOutcome(
+                message,
+                key[0][1] - prey.get_health(),
+                key[1][1] - predator.get_health(),
+            )
+            self.cache.fights.put(key, outcome)
+        else:
+            prey.use_health(outcome.prey_damage)
+            predator.use_health(outcome.predator_damage)
+        self.sink.emit(FightWon(outcome.message))
+        return outcome.message
+
+
+def test_lru_evicts_least_recently_used():
+    cache: LRUCache[int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b") is None and (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cached_chase_matches_chase():
+    rng, cache = Random(11), OutcomeCache.bounded(64)
+    for _ in range(400):
+        predator, prey = random_pair(Random(rng.randint(0, 20)))
+        expected_predator, expected_prey = deepcopy(predator), deepcopy(prey)
+        sink, expected_sink = BufferedSink(False), BufferedSink(False)
+
+        message = CachedChase(
+            predator, prey, *greedy_pair(predator, prey), sink, cache=cache
+        ).chase()
+        expected = Chase(
+            expected_predator,
+            expected_prey,
+            *greedy_pair(expected_predator, expected_prey),
+            expected_sink,
+        ).chase()
+
+        assert message == expected and sink.events == expected_sink.events
+        assert predator == expected_predator and prey == expected_prey
+    assert cache.chases.hits > 300 and len(cache.chases.entries) <= 21
+
+
+def test_cached_fight_skips_repeated_matchups():
+    cache = OutcomeCache()
+    for _ in range(3):
+        predator, prey = random_pair(Random(2))
+        message = CachedFight(prey, predator, sink=NullSink(), cache=cache).fight()
+        expected_predator, expected_prey = random_pair(Random(2))
+
+        assert (
+            message == Fight(expected_prey, expected_predator, sink=NullSink()).fight()
+        )
+        assert predator == expected_predator and prey == expected_prey
+
+    assert (cache.fights.hits, cache.fights.misses) == (2, 1)
+    assert message in (constants.PREDATOR_WIN_MESSAGE, constants.PREY_WIN_MESSAGE)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Generator
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1.atomic import atomic_write
+from Assignment1.batch import evolve_matchups, greedy_batch_chase
+from Assignment1.stats import OutcomeAggregator
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def run_chunk(seed: np.random.SeedSequence, size: int) -> OutcomeAggregator:
+    predators, prey = evolve_matchups(size, np.random.default_rng(seed))
+    outcome = greedy_batch_chase(predators, prey).chase()
+    return OutcomeAggregator.of(outcome, predators, prey)
+
+
+# Chunk seeds are spawned from the campaign seed, so the campaign, the bitmap
+# of chunks already merged and their running total are all the state a
+# resumed run needs to draw the same matchups as an uninterrupted one.
+@dataclass
+class Checkpoint:
+    campaign: tuple[int, int, int, float | None]
+    done: NDArray[np.bool_]
+    total: OutcomeAggregator = field(default_factory=OutcomeAggregator)
+
+    def save(self, path: Path) -> None:
+        with atomic_write(path) as file:
+            pickle.dump(self, file)
+
+    @classmethod
+    def load(cls, path: Path) -> Checkpoint:
+        with open(path, "rb") as file:
+            checkpoint: Checkpoint = pickle.load(file)
+            return checkpoint
+
+
+@dataclass
+class Campaign:
+    matchups: int
+    seed: int = 0
+    workers: int = 1
+    chunk_size: int = 10_000
+    target_width: float | None = None
+    checkpoint: Path | None = None
+    checkpoint_interval: float = 5.0
+
+    def chunk_sizes(self) -> list[int]:
+        full, rest = divmod(self.matchups, self.chunk_size)
+        return [self.chunk_size] * full + ([rest] if rest else [])
+
+    def chunk_seeds(self) -> list[np.random.SeedSequence]:
+        return np.random.SeedSequence(self.seed).spawn(len(self.chunk_sizes()))
+
+    def results(
+        self, done: NDArray[np.bool_]
+    ) -> Generator[tuple[int, OutcomeAggregator], None, None]:
+        todo = np.flatnonzero(~done).tolist()
+        all_seeds, all_sizes = self.chunk_seeds(), self.chunk_sizes()
+        seeds, sizes = [all_seeds[i] for i in todo], [all_sizes[i] for i in todo]
+        if self.workers == 1:
+            yield from zip(todo, map(run_chunk, seeds, sizes))
+            return
+        pool = ProcessPoolExecutor(self.workers)
+        try:
+            yield from zip(todo, pool.map(run_chunk, seeds, sizes))
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def identity(self) -> tuple[int, int, int, float | None]:
+        return self.matchups, self.seed, self.chunk_size, self.target_width
+
+    def start(self, resume: bool) -> Checkpoint:
+        if resume and self.checkpoint is not None and self.checkpoint.exists():
+            checkpoint = Checkpoint.load(self.checkpoint)
+            if checkpoint.campaign != self.identity():
+                raise CheckpointError(
+                    str(self.checkpoint) + " belongs to a different campaign"
+                )
+            return checkpoint
+        return Checkpoint(
+            self.identity(), np.zeros(len(self.chunk_sizes()), dtype=np.bool_)
+        )
+
+    def converged(self, total: OutcomeAggregator) -> bool:
+        if self.target_width is None:
+            return False
+        low, high = total.win_rate_interval()
+        return high - low <= self.target_width
+
+    # With a target width, matchups is the budget: chunks are merged in order
+    # and the campaign stops after the first one whose Wilson interval on the
+    # predator win rate is narrow enough, whatever the worker count. With a
+    # checkpoint path, progress is saved at most every checkpoint_interval
+    # seconds and once more at the end.
+    def run(self, resume: bool = False) -> OutcomeAggregator:
+        state = self.start(resume)
+        saved = time.monotonic()
+        if not self.converged(state.total):
+            with closing(self.results(state.done)) as results:
+                for index, result in results:
+                    state.total.merge(result)
+                    state.done[index] = True
+                    if self.converged(state.total):
+                        break
+                    if (
+                        self.checkpoint is not None
+                        and time.monotonic() - saved >= self.checkpoint_interval
+                    ):
+                        state.save(self.checkpoint)
+                        saved = time.monotonic()
+        if self.checkpoint is not None:
+            state.save(self.checkpoint)
+        return state.total
+
+
+def test_campaign_counts_every_matchup():
+    result = Campaign(2_500, seed=3, chunk_size=1_000).run()
+
+    assert result.matchups == 2_500 and result.chase_lengths.count == 2_500
+    assert result.predator_wins + result.escapes <= result.matchups
+    assert 0 < result.predator_win_rate() < 1
+
+
+def test_campaign_independent_of_worker_count():
+    serial = Campaign(3_000, seed=8, workers=1, chunk_size=500).run()
+    parallel = Campaign(3_000, seed=8, workers=3, chunk_size=500).run()
+
+    assert serial == parallel
+
+
+def test_campaign_seed_changes_results():
+    first = Campaign(2_000, seed=1, chunk_size=500).run()
+    second = Campaign(2_000, seed=2, chunk_size=500).run()
+
+    assert first != second
+
+
+def test_campaign_stops_at_target_width():
+    campaign = Campaign(200_000, seed=4, chunk_size=1_000, target_width=0.05)
+    result = campaign.run()
+    low, high = result.win_rate_interval()
+
+    assert high - low <= 0.05 and result.matchups < 200_000
+    assert (
+        result
+        == Campaign(
+            200_000, seed=4, workers=2, chunk_size=1_000, target_width=0.05
+        ).run()
+    )
+
+
+def test_campaign_respects_budget():
+    result = Campaign(3_000, seed=4, chunk_size=1_000, target_width=0.001).run()
+
+    assert result.matchups == 3_000
+
+
+@dataclass
+class Preempted(Campaign):
+    after: int = 0
+
+    def results(
+        self, done: NDArray[np.bool_]
+    ) -> Generator[tuple[int, OutcomeAggregator], None, None]:
+        for count, item in enumerate(super().results(done)):
+            if count == self.after:
+                raise KeyboardInterrupt
+            yield item
+
+
+def test_resumed_campaign_matches_uninterrupted_run(tmp_path):
+    path = tmp_path / "campaign.checkpoint"
+    try:
+        Preempted(5_500, 2, 1, 500, None, path, 0.0, after=4).run()
+    except KeyboardInterrupt:
+        pass
+
+    assert Checkpoint.load(path).done.tolist() == [True] * 4 + [False] * 7
+    resumed = Campaign(5_500, 2, 2, 500, checkpoint=path).run(resume=True)
+    assert resumed == Campaign(5_500, 2, chunk_size=500).run()
+    assert Checkpoint.load(path).done.all()
+
+
+def test_resume_rejects_another_campaign(tmp_path):
+    path = tmp_path / "campaign.checkpoint"
+    Campaign(1_000, 1, chunk_size=500, checkpoint=path).run()
+
+    try:
+        Campaign(1_000, 2, chunk_size=500, checkpoint=path).run(resume=True)
+    except CheckpointError:
+        return
+    assert False
+
+
+def test_chunk_sizes():
+    assert Campaign(25, chunk_size=10).chunk_sizes() == [10, 10, 5]
@@ -1,21 +1,38 @@
-from dataclasses import dataclass
-from random import randint
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from typing import Protocol
+
+import numpy as np
+from numpy.typing import NDArray
 
 from Assignment1 import constants
+from Assignment1.events import CONSOLE, BufferedSink, EventSink, TraitLogged
+
+
+class RandomSource(Protocol):
+    def randint(self, a: int, b: int) -> int:
+        pass
+
+    def random(self) -> float:
+        pass
 
 
 @dataclass
 class Position:
-    position: int = constants.DEFAULT_POSITION
+    position: int = field(default_factory=lambda: constants.DEFAULT_POSITION)
 
     def get_position(self) -> int:
         return self.position
 
-    def generate_position(self, min_pos, max_pos) -> None:
-        self.position = randint(min_pos, max_pos)
+    def generate_position(
+        self, min_pos: int, max_pos: int, rng: RandomSource = random
+    ) -> None:
+        self.position = rng.randint(min_pos, max_pos)
 
-    def log_position(self) -> None:
-        print("Position: " + str(self.position))
+    def log_position(self, sink: EventSink = CONSOLE) -> None:
+        sink.emit(TraitLogged("Position", str(self.position)))
 
     def increment_position(self, value) -> None:
         self.position += value
@@ -54,16 +71,16 @@ def test_set_position():
 
 @dataclass
 class Stamina:
-    stamina: int = constants.DEFAULT_STAMINA
+    stamina: int = field(default_factory=lambda: constants.DEFAULT_STAMINA)
 
     def get_stamina(self) -> int:
         return self.stamina
 
-    def generate_stamina(self) -> None:
-        self.stamina = randint(constants.MIN_STAMINA, constants.MAX_STAMINA)
+    def generate_stamina(self, rng: RandomSource = random) -> None:
+        self.stamina = rng.randint(constants.MIN_STAMINA, constants.MAX_STAMINA)
 
-    def log_stamina(self) -> None:
-        print("Stamina: " + str(self.stamina))
+    def log_stamina(self, sink: EventSink = CONSOLE) -> None:
+        sink.emit(TraitLogged("Stamina", str(self.stamina)))
 
     def decrement_stamina(self, value) -> None:
         self.stamina -= value
@@ -93,16 +110,16 @@ def test_decrement_stamina():
 
 @dataclass
 class Legs:
-    legs: int = constants.DEFAULT_LEGS
+    legs: int = field(default_factory=lambda: constants.DEFAULT_LEGS)
 
     def get_num_legs(self) -> int:
         return self.legs
 
-    def evolve_legs(self) -> None:
-        self.legs = randint(constants.MIN_LEGS, constants.MAX_LEGS)
+    def evolve_legs(self, rng: RandomSource = random) -> None:
+        self.legs = rng.randint(constants.MIN_LEGS, constants.MAX_LEGS)
 
-    def log_legs(self) -> None:
-        print("Legs: " + str(self.legs))
+    def log_legs(self, sink: EventSink = CONSOLE) -> None:
+        sink.emit(TraitLogged("Legs", str(self.legs)))
 
 
 def test_get_num_legs():
@@ -119,16 +136,16 @@ def test_evolve_legs():
 
 @dataclass
 class Wings:
-    wings: int = constants.DEFAULT_WINGS
+    wings: int = field(default_factory=lambda: constants.DEFAULT_WINGS)
 
     def get_num_wings(self) -> int:
         return self.wings
 
-    def evolve_wings(self) -> None:
-        self.wings = randint(constants.MIN_WINGS, constants.MAX_WINGS)
+    def evolve_wings(self, rng: RandomSource = random) -> None:
+        self.wings = rng.randint(constants.MIN_WINGS, constants.MAX_WINGS)
 
-    def log_legs(self) -> None:
-        print("Wings: " + str(self.wings))
+    def log_legs(self, sink: EventSink = CONSOLE) -> None:
+        sink.emit(TraitLogged("Wings", str(self.wings)))
 
 
 def test_get_num_wings():
@@ -145,7 +162,7 @@ def test_evolve_wings():
 
 @dataclass
 class Claws:
-    claw_level: int = constants.DEFAULT_CLAW_LEVEL
+    claw_level: int = field(default_factory=lambda: constants.DEFAULT_CLAW_LEVEL)
 
     def get_claw_level(self) -> int:
         return self.claw_level
@@ -153,11 +170,11 @@ class Claws:
     def get_claw_size(self) -> str:
         return constants.CLAWS[self.claw_level]
 
-    def evolve_claws(self) -> None:
-        self.claw_level = randint(constants.MIN_CLAW, constants.MAX_CLAW)
+    def evolve_claws(self, rng: RandomSource = random) -> None:
+        self.claw_level = rng.randint(constants.MIN_CLAW, constants.MAX_CLAW)
 
-    def log_claws(self) -> None:
-        print("Claws: " + self.get_claw_size())
+    def log_claws(self, sink: EventSink = CONSOLE) -> None:
+        sink.emit(TraitLogged("Claws", self.get_claw_size()))
 
 
 def test_get_claw_level():
@@ -178,16 +195,16 @@ def test_generate_claws():
 
 @dataclass
 class Teeth:
-    sharpness: int = constants.DEFAULT_TEETH_SHARPNESS
+    sharpness: int = field(default_factory=lambda: constants.DEFAULT_TEETH_SHARPNESS)
 
     def get_sharpness(self) -> int:
         return self.sharpness
 
-    def evolve_teeth(self) -> None:
-        self.sharpness = randint(constants.MIN_TEETH, constants.MAX_TEETH)
+    def evolve_teeth(self, rng: RandomSource = random) -> None:
+        self.sharpness = rng.randint(constants.MIN_TEETH, constants.MAX_TEETH)
 
-    def log_teeth(self) -> None:
-        print("Teeth sharpness: " + str(self.get_sharpness()))
+    def log_teeth(self, sink: EventSink = CONSOLE) -> None:
+        sink.emit(TraitLogged("Teeth sharpness", str(self.get_sharpness())))
 
 
 def test_get_teeth_sharpness():
@@ -204,16 +221,16 @@ def test_generate_teeth_sharpness():
 
 @dataclass
 class Health:
-    health: int = constants.DEFAULT_HEALTH
+    health: int = field(default_factory=lambda: constants.DEFAULT_HEALTH)
 
     def get_health(self) -> int:
         return self.health
 
-    def generate_health(self) -> None:
-        self.health = randint(constants.MIN_HEALTH, constants.MAX_HEALTH)
+    def generate_health(self, rng: RandomSource = random) -> None:
+        self.health = rng.randint(constants.MIN_HEALTH, constants.MAX_HEALTH)
 
-    def log_health(self) -> None:
-        print("Health: " + str(self.health))
+    def log_health(self, sink: EventSink = CONSOLE) -> None:
+        sink.emit(TraitLogged("Health", str(self.health)))
 
     def decrement_health(self, value) -> None:
         self.health -= value
@@ -237,3 +254,75 @@ def test_decrement_health():
     health.decrement_health(5)
 
     assert health.get_health() == 65
+
+
+def test_trait_logs_go_to_the_sink(capsys):
+    sink = BufferedSink()
+
+    Position(7).log_position(sink)
+    Claws(3).log_claws(sink)
+    Health(60).log_health()
+
+    assert sink.events == [
+        TraitLogged("Position", "7"),
+        TraitLogged("Claws", "big claws"),
+    ]
+    assert capsys.readouterr().out == "Health: 60\n"
+
+
+@dataclass
+class TraitGenerator:
+    rng: np.random.Generator
+
+    def draw(self, size: int, low: int, high: int) -> NDArray[np.int64]:
+        return self.rng.integers(low, high, size=size, endpoint=True)
+
+    def generate_position(
+        self, size: int, min_pos: int, max_pos: int
+    ) -> NDArray[np.int64]:
+        return self.draw(size, min_pos, max_pos)
+
+    def generate_stamina(self, size: int) -> NDArray[np.int64]:
+        return self.draw(size, constants.MIN_STAMINA, constants.MAX_STAMINA)
+
+    def evolve_legs(self, size: int) -> NDArray[np.int64]:
+        return self.draw(size, constants.MIN_LEGS, constants.MAX_LEGS)
+
+    def evolve_wings(self, size: int) -> NDArray[np.int64]:
+        return self.draw(size, constants.MIN_WINGS, constants.MAX_WINGS)
+
+    def evolve_claws(self, size: int) -> NDArray[np.int64]:
+        return self.draw(size, constants.MIN_CLAW, constants.MAX_CLAW)
+
+    def evolve_teeth(self, size: int) -> NDArray[np.int64]:
+        return self.draw(size, constants.MIN_TEETH, constants.MAX_TEETH)
+
+    def generate_health(self, size: int) -> NDArray[np.int64]:
+        return self.draw(size, constants.MIN_HEALTH, constants.MAX_HEALTH)
+
+
+def test_injected_rng_is_reproducible():
+    first, second = Stamina(), Stamina()
+
+    first.generate_stamina(random.Random(4))
+    second.generate_stamina(random.Random(4))
+
+    assert first == second
+
+
+def test_trait_generator_respects_bounds():
+    traits = TraitGenerator(np.random.default_rng(2))
+
+    legs = traits.evolve_legs(10_000)
+    health = traits.generate_health(10_000)
+
+    assert legs.min() == constants.MIN_LEGS and legs.max() == constants.MAX_LEGS
+    assert health.min() == constants.MIN_HEALTH
+    assert health.max() == constants.MAX_HEALTH
+
+
+def test_trait_generator_is_reproducible():
+    first = TraitGenerator(np.random.default_rng(6)).generate_stamina(100)
+    second = TraitGenerator(np.random.default_rng(6)).generate_stamina(100)
+
+    assert (first == second).all()
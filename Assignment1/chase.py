@@ -1,35 +1,98 @@
 from dataclasses import dataclass, field
+from typing import Generator, TypeVar
 
 from Assignment1 import constants
 from Assignment1.characteristics import Legs, Position, Stamina, Wings
-from Assignment1.creature import Predator, Prey
+from Assignment1.creature import CreatureInterface, Predator, Prey
+from Assignment1.events import (
+    CONSOLE,
+    BufferedSink,
+    Caught,
+    Escaped,
+    EventSink,
+    Moved,
+    NullSink,
+)
 from Assignment1.fight import Fight
 from Assignment1.move import GreedyMove, MoveInterface, NoMove
 from Assignment1.movement_info import MovementInfo
+from Assignment1.recorder import Recorder, replay
+
+T = TypeVar("T")
+
+
+def finish(steps: Generator[int, None, T]) -> T:
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            result: T = stop.value
+            return result
 
 
 @dataclass
 class Chase:
-    predator: Predator = field(default_factory=Predator)
-    prey: Prey = field(default_factory=Prey)
+    predator: CreatureInterface = field(default_factory=Predator)
+    prey: CreatureInterface = field(default_factory=Prey)
     predator_move: MoveInterface = field(default_factory=NoMove)
     prey_move: MoveInterface = field(default_factory=NoMove)
+    sink: EventSink = field(default=CONSOLE, repr=False)
+    recorder: Recorder | None = field(default=None, repr=False)
+
+    def chase(self) -> str:
+        return self.engage() if finish(self.ticks()) else self.escape()
+
+    def steps(self) -> Generator[int, None, str]:
+        caught = yield from self.ticks()
+        return self.engage() if caught else self.escape()
 
-    def chase(self) -> None:
-        while 1:
-            if self.predator.has_stamina():
-                self.predator_move.move()
-                self.prey_move.move()
-                if self.predator_caught_prey():
-                    Fight(self.prey, self.predator).fight()
-                    break
-            else:
-                print("Pray ran into infinity")
-                return
+    # Runs the chase itself, yielding each tick the prey survives, and returns
+    # whether the prey was caught. What happens next is up to the caller.
+    def ticks(self) -> Generator[int, None, bool]:
+        records_moves, recorder = self.sink.records_moves, self.recorder
+        if recorder is not None:
+            recorder.start(self.predator, self.prey)
+        tick, caught = 0, False
+        while self.predator.has_stamina():
+            predator_step = self.predator_move.move()
+            prey_step = self.prey_move.move()
+            tick += 1
+            if recorder is not None:
+                recorder.record(predator_step, prey_step)
+            if records_moves:
+                self.log_move()
+            if self.predator_caught_prey():
+                caught = True
+                break
+            yield tick
+        if recorder is not None:
+            recorder.finish(self.predator, self.prey)
+        return caught
 
     def predator_caught_prey(self) -> bool:
         return self.predator.get_position() >= self.prey.get_position()
 
+    def log_move(self) -> None:
+        self.sink.emit(
+            Moved(
+                self.predator.get_position(),
+                self.prey.get_position(),
+                self.predator.get_stamina(),
+                self.prey.get_stamina(),
+            )
+        )
+
+    def engage(self) -> str:
+        self.sink.emit(Caught(self.predator.get_position(), self.prey.get_position()))
+        return self.new_fight().fight()
+
+    def new_fight(self) -> Fight:
+        return Fight(self.prey, self.predator, sink=self.sink)
+
+    def escape(self) -> str:
+        self.sink.emit(Escaped(self.predator.get_position(), self.prey.get_position()))
+        return constants.PREY_WIN_MESSAGE
+
 
 def test_chase_predator_caught_prey():
     predator = Predator(Position(0), Stamina(25), Legs(2), Wings(2))
@@ -40,13 +103,15 @@ def test_chase_predator_caught_prey():
     prey_move = GreedyMove(
         MovementInfo(constants.MOVE_INFO), prey, constants.MOVEMENT_ORDER
     )
-    Chase(
+    message = Chase(
         predator,
         prey,
         predator_move,
         prey_move,
     ).chase()
 
+    assert message in (constants.PREDATOR_WIN_MESSAGE, constants.PREY_WIN_MESSAGE)
+
 
 def test_chase_prey_ran_into_infinity():
     predator = Predator(Position(0), Stamina(15), Legs(1), Wings(1))
@@ -66,3 +131,82 @@ def test_chase_prey_ran_into_infinity():
     chase.chase()
 
     assert not predator.has_stamina() and not chase.predator_caught_prey()
+
+
+def test_chase_emits_events():
+    sink = BufferedSink()
+    predator = Predator(Position(0), Stamina(25), Legs(2), Wings(2), sink=sink)
+    prey = Prey(Position(5), Stamina(15), Legs(1), Wings(0), sink=sink)
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+
+    Chase(
+        predator,
+        prey,
+        GreedyMove(info, predator, order),
+        GreedyMove(info, prey, order),
+        sink,
+    ).chase()
+
+    kinds = [type(event).__name__ for event in sink.events]
+    assert kinds == ["Moved", "Moved", "Moved", "Caught", "FightWon"]
+    assert sink.events[2] == Moved(9, 8, 19, 12)
+
+
+def test_chase_steps_yield_each_tick():
+    predator = Predator(Position(0), Stamina(25), Legs(2), Wings(2))
+    prey = Prey(Position(5), Stamina(15), Legs(1), Wings(0))
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+    steps = Chase(
+        predator,
+        prey,
+        GreedyMove(info, predator, order),
+        GreedyMove(info, prey, order),
+    ).steps()
+
+    assert [next(steps), next(steps)] == [1, 2]
+    assert (predator.get_position(), prey.get_position()) == (6, 7)
+    assert finish(steps) == constants.PREDATOR_WIN_MESSAGE
+
+
+def test_recorded_chase_replays():
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+    for stamina in (25, 400):
+        predator = Predator(Position(0), Stamina(stamina), Legs(2), Wings(2))
+        prey = Prey(Position(40), Stamina(300), Legs(1), Wings(0))
+        recorder = Recorder(info)
+        Chase(
+            predator,
+            prey,
+            GreedyMove(info, predator, order),
+            GreedyMove(info, prey, order),
+            recorder=recorder,
+        ).chase()
+        recording = recorder.recording()
+
+        outcome = replay(recording, info, order)
+
+        assert outcome == ("escaped" if stamina == 25 else "caught")
+        assert recording.path[-1, 0] == predator.get_position()
+
+
+def test_recording_uses_the_chase_movement_table():
+    info = MovementInfo(dict(constants.MOVE_INFO, walk=(40, 2, 7, 2, 0)))
+    order = constants.MOVEMENT_ORDER
+    predator = Predator(Position(0), Stamina(100), Legs(2), Wings(0))
+    prey = Prey(Position(60), Stamina(100), Legs(1), Wings(0))
+    recorder = Recorder(info)
+    Chase(
+        predator,
+        prey,
+        GreedyMove(info, predator, order),
+        GreedyMove(info, prey, order),
+        NullSink(),
+        recorder,
+    ).chase()
+    recording = recorder.recording()
+
+    assert replay(recording, info, order) == "caught"
+    assert tuple(recording.path[-1].tolist()) == recording.end_state
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import math
+import random
+from argparse import ArgumentParser
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from Assignment1 import constants
+from Assignment1.characteristics import RandomSource
+from Assignment1.chase import Chase
+from Assignment1.creature import CreatureInterface, Genome, Predator, Prey
+from Assignment1.events import NullSink
+from Assignment1.evolution import GENES, bounds
+from Assignment1.move import GreedyMove, MoveInterface, RandomMove
+from Assignment1.movement_info import MovementInfo
+from Assignment1.policy import PolicyMove
+from Assignment1.stats import RunningStats
+
+# A strategy builds the move for a creature from its opponent, whether it is
+# the predator, and its own random stream.
+Strategy = Callable[
+    [MovementInfo, CreatureInterface, CreatureInterface, bool, RandomSource],
+    MoveInterface,
+]
+
+
+# The policy keeps its tables in memory only, unless given a directory to
+# cache them on disk across runs.
+def policy_strategy(directory: Path | None = None) -> Strategy:
+    return lambda info, creature, opponent, hunting, rng: PolicyMove(
+        info, creature, opponent, hunting, directory
+    )
+
+
+STRATEGIES: dict[str, Strategy] = {
+    "greedy": lambda info, creature, opponent, hunting, rng: GreedyMove(
+        info, creature, constants.MOVEMENT_ORDER
+    ),
+    "random": lambda info, creature, opponent, hunting, rng: RandomMove(
+        info, creature, constants.MOVEMENT_ORDER, rng=rng
+    ),
+    "policy": policy_strategy(),
+}
+
+
+def mirror(genome: Genome, position: tuple[int, int]) -> Genome:
+    traits = {name: sum(bounds(name)) - getattr(genome, name) for name in GENES}
+    return replace(genome, position=sum(position) - genome.position, **traits)
+
+
+@dataclass
+class Antithetic:
+    rng: RandomSource
+
+    def randint(self, a: int, b: int) -> int:
+        return a + b - self.rng.randint(a, b)
+
+    def random(self) -> float:
+        return (1.0 - self.rng.random()) % 1.0
+
+
+@dataclass(frozen=True)
+class Arm:
+    predator: str = "greedy"
+    prey: str = "greedy"
+
+
+@dataclass
+class Matchup:
+    predator: Genome
+    prey: Genome
+    predator_stream: int
+    prey_stream: int
+
+    @classmethod
+    def draw(cls, seed: int, index: int) -> Matchup:
+        states = np.random.SeedSequence([seed, index]).generate_state(3).tolist()
+        rng = random.Random(states[0])
+        stamina = bounds("stamina")
+        predator = Genome.random(rng, 0, stamina)
+        prey_position = rng.randint(constants.MIN_POS, constants.MAX_POS)
+        return cls(predator, Genome.random(rng, prey_position, stamina), *states[1:])
+
+    def predator_won(
+        self,
+        arm: Arm,
+        antithetic: bool = False,
+        strategies: dict[str, Strategy] = STRATEGIES,
+    ) -> int:
+        predator_genome, prey_genome = self.predator, self.prey
+        streams: list[RandomSource] = [
+            random.Random(self.predator_stream),
+            random.Random(self.prey_stream),
+        ]
+        if antithetic:
+            predator_genome = mirror(predator_genome, (0, 0))
+            prey_genome = mirror(prey_genome, (constants.MIN_POS, constants.MAX_POS))
+            streams = [Antithetic(stream) for stream in streams]
+        sink, info = NullSink(), MovementInfo(constants.MOVE_INFO)
+        predator = predator_genome.creature(Predator, sink)
+        prey = prey_genome.creature(Prey, sink)
+        message = Chase(
+            predator,
+            prey,
+            strategies[arm.predator](info, predator, prey, True, streams[0]),
+            strategies[arm.prey](info, prey, predator, False, streams[1]),
+            sink,
+        ).chase()
+        return int(message == constants.PREDATOR_WIN_MESSAGE)
+
+
+# Both arms see the same genomes and the same move streams, so each unit
+# yields a paired difference. With antithetic pairing a unit is a matchup and
+# its mirror image, averaged. The variance reduction is measured against two
+# independent arms running the same number of chases, whose outcomes are
+# Bernoulli draws at the observed win rates.
+@dataclass
+class Comparison:
+    chases_per_unit: int = 1
+    first: RunningStats = field(default_factory=RunningStats)
+    second: RunningStats = field(default_factory=RunningStats)
+    difference: RunningStats = field(default_factory=RunningStats)
+
+    def add(self, first: float, second: float) -> None:
+        self.first.add(first)
+        self.second.add(second)
+        self.difference.add(first - second)
+
+    def interval(self, z: float = 1.96) -> tuple[float, float]:
+        d = self.difference
+        spread = z * d.std() / math.sqrt(d.count) if d.count else math.inf
+        return d.mean - spread, d.mean + spread
+
+    def variance_reduction(self) -> float:
+        independent = (
+            sum(arm.mean * (1 - arm.mean) for arm in (self.first, self.second))
+            / self.chases_per_unit
+        )
+        paired = self.difference.variance()
+        return independent / paired if paired else math.inf
+
+    def summary(self) -> str:
+        low, high = self.interval()
+        return "\n".join(
+            [
+                "Units: " + str(self.difference.count),
+                "First win rate: " + format(self.first.mean, ".4f"),
+                "Second win rate: " + format(self.second.mean, ".4f"),
+                "Difference: " + format(self.difference.mean, ".4f"),
+                "Difference 95% CI: "
+                + format(low, ".4f")
+                + " - "
+                + format(high, ".4f"),
+                "Variance reduction: " + format(self.variance_reduction(), ".1f") + "x",
+            ]
+        )
+
+
+def compare(
+    first: Arm,
+    second: Arm,
+    units: int,
+    seed: int = 0,
+    antithetic: bool = False,
+    strategies: dict[str, Strategy] = STRATEGIES,
+) -> Comparison:
+    comparison = Comparison(2 if antithetic else 1)
+    for index in range(units):
+        matchup = Matchup.draw(seed, index)
+        a = float(matchup.predator_won(first, False, strategies))
+        b = float(matchup.predator_won(second, False, strategies))
+        if antithetic:
+            a = (a + matchup.predator_won(first, True, strategies)) / 2
+            b = (b + matchup.predator_won(second, True, strategies)) / 2
+        comparison.add(a, b)
+    return comparison
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Paired comparison of movement strategies")
+    parser.add_argument("first", help="predator:prey strategies, e.g. greedy:random")
+    parser.add_argument("second", help="predator:prey strategies, e.g. greedy:greedy")
+    parser.add_argument("--units", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--antithetic", action="store_true")
+    parser.add_argument(
+        "--policy-cache", type=Path, help="directory to keep policy tables in"
+    )
+    args = parser.parse_args(argv)
+
+    first, second = (Arm(*arm.split(":")) for arm in (args.first, args.second))
+    strategies = dict(STRATEGIES, policy=policy_strategy(args.policy_cache))
+    comparison = compare(
+        first, second, args.units, args.seed, args.antithetic, strategies
+    )
+    print(comparison.summary())
+
+
+def test_same_arm_has_no_difference():
+    comparison = compare(Arm("random"), Arm("random"), 200, seed=1)
+
+    assert comparison.interval() == (0.0, 0.0)
+
+
+def test_mirror_is_an_involution():
+    matchup = Matchup.draw(2, 7)
+    prey = mirror(matchup.prey, (constants.MIN_POS, constants.MAX_POS))
+
+    assert mirror(prey, (constants.MIN_POS, constants.MAX_POS)) == matchup.prey
+    assert prey.stamina == constants.MIN_STAMINA + constants.MAX_STAMINA - (
+        matchup.prey.stamina
+    )
+
+
+def test_antithetic_stream_mirrors_draws():
+    plain, mirrored = random.Random(5), Antithetic(random.Random(5))
+
+    assert [plain.randint(1, 6) for _ in range(20)] == [
+        7 - mirrored.randint(1, 6) for _ in range(20)
+    ]
+    assert 0 <= mirrored.random() < 1
+
+
+def test_common_random_numbers_reduce_variance():
+    comparison = compare(Arm("greedy", "greedy"), Arm("greedy", "random"), 400, seed=3)
+    low, high = comparison.interval()
+
+    assert comparison.variance_reduction() > 2
+    assert low < comparison.difference.mean < high
+
+
+def test_antithetic_units_average_both_matchups():
+    comparison = compare(Arm(), Arm("random"), 100, seed=4, antithetic=True)
+
+    assert comparison.chases_per_unit == 2
+    assert comparison.first.minimum >= 0 and comparison.first.maximum <= 1
+    total = 200 * comparison.difference.mean
+    assert math.isclose(total, round(total), abs_tol=1e-9)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import random
 from dataclasses import dataclass, field
+from typing import ClassVar, Protocol, TypeVar
 
 from Assignment1 import constants
 from Assignment1.characteristics import (
@@ -8,10 +10,50 @@ from Assignment1.characteristics import (
     Health,
     Legs,
     Position,
+    RandomSource,
     Stamina,
     Teeth,
     Wings,
 )
+from Assignment1.events import CONSOLE, BufferedSink, EventSink, Evolved
+
+
+class CreatureInterface(Protocol):
+    def get_position(self) -> int:
+        pass
+
+    def get_stamina(self) -> int:
+        pass
+
+    def get_num_legs(self) -> int:
+        pass
+
+    def get_num_wings(self) -> int:
+        pass
+
+    def use_stamina(self, value: int) -> None:
+        pass
+
+    def increment_position(self, value: int) -> None:
+        pass
+
+    def has_stamina(self) -> bool:
+        pass
+
+    def get_health(self) -> int:
+        pass
+
+    def use_health(self, value: int) -> None:
+        pass
+
+    def get_attack_power(self) -> int:
+        pass
+
+    def has_health(self) -> bool:
+        pass
+
+    def attack(self, prey: CreatureInterface) -> None:
+        pass
 
 
 @dataclass
@@ -23,7 +65,9 @@ class Creature:
     claws: Claws = field(default_factory=Claws)
     teeth: Teeth = field(default_factory=Teeth)
     health: Health = field(default_factory=Health)
-    power: int = constants.DEFAULT_POWER
+    power: int = field(default_factory=lambda: constants.DEFAULT_POWER)
+    sink: EventSink = field(default=CONSOLE, compare=False, repr=False)
+    role: ClassVar[str] = ""
 
     def __post_init__(self):
         self.generate_power()
@@ -47,22 +91,26 @@ class Creature:
         self.position.increment_position(value)
 
     def log_characteristics(self) -> None:
-        self.position.log_position()
-        self.stamina.log_stamina()
-        self.legs.log_legs()
-        self.wings.log_legs()
-        self.claws.log_claws()
-        self.teeth.log_teeth()
-        self.health.log_health()
-        print()
-
-    def evolve(self) -> None:
-        self.stamina.generate_stamina()
-        self.legs.evolve_legs()
-        self.wings.evolve_wings()
-        self.claws.evolve_claws()
-        self.teeth.evolve_teeth()
-        self.health.generate_health()
+        self.sink.emit(
+            Evolved(
+                self.role,
+                self.get_position(),
+                self.get_stamina(),
+                self.get_num_legs(),
+                self.get_num_wings(),
+                self.get_claws(),
+                self.get_teeth_sharpness(),
+                self.get_health(),
+            )
+        )
+
+    def evolve(self, rng: RandomSource = random) -> None:
+        self.stamina.generate_stamina(rng)
+        self.legs.evolve_legs(rng)
+        self.wings.evolve_wings(rng)
+        self.claws.evolve_claws(rng)
+        self.teeth.evolve_teeth(rng)
+        self.health.generate_health(rng)
         self.generate_power()
 
     def has_stamina(self) -> bool:
@@ -92,32 +140,207 @@ class Creature:
     def has_health(self) -> bool:
         return self.get_health() > 0
 
-    def attack(self, prey: Creature):
+    def attack(self, prey: CreatureInterface) -> None:
         prey.use_health(self.get_attack_power())
 
 
 @dataclass
 class Predator(Creature):
-    def evolve(self) -> None:
+    role: ClassVar[str] = "Predator"
+
+    def evolve(self, rng: RandomSource = random) -> None:
         self.position.set_position(0)
-        super().evolve()
+        super().evolve(rng)
         self.log_characteristics()
 
-    def log_characteristics(self) -> None:
-        print("Predator:")
-        super().log_characteristics()
-
 
 @dataclass
 class Prey(Creature):
-    def evolve(self, min_pos=constants.MIN_POS, max_pos=constants.MAX_POS):
-        self.position.generate_position(min_pos, max_pos)
-        super().evolve()
+    role: ClassVar[str] = "Prey"
+
+    # min_pos and max_pos keep their original positional places, so rng can
+    # only be passed by keyword here.
+    def evolve(  # type: ignore[override]
+        self,
+        min_pos: int | None = None,
+        max_pos: int | None = None,
+        *,
+        rng: RandomSource = random,
+    ) -> None:
+        self.position.generate_position(
+            constants.MIN_POS if min_pos is None else min_pos,
+            constants.MAX_POS if max_pos is None else max_pos,
+            rng,
+        )
+        super().evolve(rng)
         self.log_characteristics()
 
+
+@dataclass(slots=True)
+class FlatCreature:
+    position: int = field(default_factory=lambda: constants.DEFAULT_POSITION)
+    stamina: int = field(default_factory=lambda: constants.DEFAULT_STAMINA)
+    legs: int = field(default_factory=lambda: constants.DEFAULT_LEGS)
+    wings: int = field(default_factory=lambda: constants.DEFAULT_WINGS)
+    claws: int = field(default_factory=lambda: constants.DEFAULT_CLAW_LEVEL)
+    teeth: int = field(default_factory=lambda: constants.DEFAULT_TEETH_SHARPNESS)
+    health: int = field(default_factory=lambda: constants.DEFAULT_HEALTH)
+    power: int = field(default_factory=lambda: constants.DEFAULT_POWER)
+    sink: EventSink = field(default=CONSOLE, compare=False, repr=False)
+    role: ClassVar[str] = ""
+
+    def __post_init__(self) -> None:
+        self.generate_power()
+
+    def get_position(self) -> int:
+        return self.position
+
+    def get_stamina(self) -> int:
+        return self.stamina
+
+    def get_num_legs(self) -> int:
+        return self.legs
+
+    def get_num_wings(self) -> int:
+        return self.wings
+
+    def use_stamina(self, value: int) -> None:
+        self.stamina -= value
+
+    def increment_position(self, value: int) -> None:
+        self.position += value
+
     def log_characteristics(self) -> None:
-        print("Prey:")
-        super().log_characteristics()
+        self.sink.emit(
+            Evolved(
+                self.role,
+                self.position,
+                self.stamina,
+                self.legs,
+                self.wings,
+                self.claws,
+                self.teeth,
+                self.health,
+            )
+        )
+
+    def evolve(self, rng: RandomSource = random) -> None:
+        self.stamina = rng.randint(constants.MIN_STAMINA, constants.MAX_STAMINA)
+        self.legs = rng.randint(constants.MIN_LEGS, constants.MAX_LEGS)
+        self.wings = rng.randint(constants.MIN_WINGS, constants.MAX_WINGS)
+        self.claws = rng.randint(constants.MIN_CLAW, constants.MAX_CLAW)
+        self.teeth = rng.randint(constants.MIN_TEETH, constants.MAX_TEETH)
+        self.health = rng.randint(constants.MIN_HEALTH, constants.MAX_HEALTH)
+        self.generate_power()
+
+    def has_stamina(self) -> bool:
+        return self.stamina > 0
+
+    def get_claws(self) -> int:
+        return self.claws
+
+    def get_teeth_sharpness(self) -> int:
+        return self.teeth
+
+    def get_health(self) -> int:
+        return self.health
+
+    def use_health(self, value: int) -> None:
+        self.health -= value
+
+    def get_attack_power(self) -> int:
+        return self.power
+
+    def generate_power(self) -> None:
+        self.power = (
+            self.power * constants.CLAWS_POWER_MULTIPLIER[self.claws]
+            + constants.TEETH_POWER_BOOST[self.teeth]
+        )
+
+    def has_health(self) -> bool:
+        return self.health > 0
+
+    def attack(self, prey: CreatureInterface) -> None:
+        prey.use_health(self.power)
+
+
+@dataclass(slots=True)
+class FlatPredator(FlatCreature):
+    role: ClassVar[str] = "Predator"
+
+    def evolve(self, rng: RandomSource = random) -> None:
+        self.position = 0
+        FlatCreature.evolve(self, rng)
+        self.log_characteristics()
+
+
+@dataclass(slots=True)
+class FlatPrey(FlatCreature):
+    role: ClassVar[str] = "Prey"
+
+    def evolve(  # type: ignore[override]
+        self,
+        min_pos: int | None = None,
+        max_pos: int | None = None,
+        *,
+        rng: RandomSource = random,
+    ) -> None:
+        self.position = rng.randint(
+            constants.MIN_POS if min_pos is None else min_pos,
+            constants.MAX_POS if max_pos is None else max_pos,
+        )
+        FlatCreature.evolve(self, rng)
+        self.log_characteristics()
+
+
+C = TypeVar("C", bound=Creature)
+
+
+@dataclass(frozen=True)
+class Genome:
+    position: int
+    stamina: int
+    legs: int
+    wings: int
+    claws: int
+    teeth: int
+    health: int
+
+    @classmethod
+    def random(
+        cls,
+        rng: RandomSource,
+        position: int,
+        stamina: tuple[int, int] | None = None,
+    ) -> Genome:
+        low, high = stamina or (constants.MIN_STAMINA, constants.MAX_STAMINA)
+        return cls(
+            position,
+            rng.randint(low, high),
+            rng.randint(constants.MIN_LEGS, constants.MAX_LEGS),
+            rng.randint(constants.MIN_WINGS, constants.MAX_WINGS),
+            rng.randint(constants.MIN_CLAW, constants.MAX_CLAW),
+            rng.randint(constants.MIN_TEETH, constants.MAX_TEETH),
+            rng.randint(constants.MIN_HEALTH, constants.MAX_HEALTH),
+        )
+
+    def creature(self, kind: type[C], sink: EventSink) -> C:
+        return kind(
+            Position(self.position),
+            Stamina(self.stamina),
+            Legs(self.legs),
+            Wings(self.wings),
+            Claws(self.claws),
+            Teeth(self.teeth),
+            Health(self.health),
+            sink=sink,
+        )
+
+
+def random_creature(
+    kind: type[C], rng: RandomSource, position: int, sink: EventSink = CONSOLE
+) -> C:
+    return Genome.random(rng, position).creature(kind, sink)
 
 
 def test_predator_evolves_correct_position():
@@ -146,6 +369,15 @@ def test_prey_evolves_correct_position_from_default_range():
     assert constants.MIN_POS <= prey.get_position() <= constants.MAX_POS
 
 
+def test_evolve_with_seeded_rng_is_reproducible():
+    first, second = Prey(), Prey()
+
+    first.evolve(rng=random.Random(12))
+    second.evolve(rng=random.Random(12))
+
+    assert first == second
+
+
 def test_generate_power_after_init():
     h = Health(30)
     creature = Creature(
@@ -177,3 +409,53 @@ def test_attack():
     predator.attack(prey)
 
     assert prey.get_health() == 6
+
+
+def test_flat_creature_evolves_like_creature():
+    creature, flat = Prey(), FlatPrey()
+
+    creature.evolve(rng=random.Random(21))
+    flat.evolve(rng=random.Random(21))
+
+    assert flat.get_position() == creature.get_position()
+    assert flat.get_stamina() == creature.get_stamina()
+    assert flat.get_attack_power() == creature.get_attack_power()
+
+
+def test_flat_creature_has_no_instance_dict():
+    assert not hasattr(FlatCreature(), "__dict__")
+
+
+def test_flat_attack():
+    prey = FlatPrey(5, 20, 1, 1, 1, 1, 30, 7)
+    predator = FlatPredator(5, 30, 1, 2, 2, 1, 30, 7)
+
+    predator.attack(prey)
+
+    assert prey.get_health() == 6
+
+
+def test_evolve_emits_to_sink():
+    sink = BufferedSink()
+    predator = Predator(sink=sink)
+
+    predator.evolve()
+
+    [event] = sink.events
+    assert isinstance(event, Evolved) and event.role == "Predator"
+
+
+def test_log_characteristics_prints_like_before(capsys):
+    Prey(Position(4), Stamina(90), Legs(2), Wings(1), Claws(3)).log_characteristics()
+
+    assert capsys.readouterr().out.splitlines() == [
+        "Prey:",
+        "Position: 4",
+        "Stamina: 90",
+        "Legs: 2",
+        "Wings: 1",
+        "Claws: big claws",
+        "Teeth sharpness: 1",
+        "Health: 75",
+        "",
+    ]
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import random
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
+from dataclasses import dataclass, field
+
+from Assignment1 import constants
+from Assignment1.characteristics import RandomSource
+from Assignment1.chase import Chase
+from Assignment1.creature import CreatureInterface, FlatPredator, FlatPrey
+from Assignment1.events import CONSOLE, Caught, EventSink, NullSink
+from Assignment1.fight import Fight
+from Assignment1.move import GreedyMove, MoveInterface
+from Assignment1.movement_info import MovementInfo
+
+
+@dataclass
+class Agent:
+    creature: CreatureInterface
+    move: MoveInterface
+
+
+@dataclass(frozen=True)
+class Census:
+    tick: int
+    predators: int
+    prey: int
+    hunting: int
+
+
+# Predators hunt forward along the line, as in Chase. A predator that still
+# has stamina catches the first unclaimed prey lying between where it started
+# the tick and where it ended it; for a single pair this is exactly the
+# predator_caught_prey check of Chase. Each catch is settled by a Fight and
+# the loser leaves the population.
+@dataclass
+class Ecosystem:
+    predators: list[Agent] = field(default_factory=list)
+    prey: list[Agent] = field(default_factory=list)
+    instant: bool = True
+    sink: EventSink = field(default=CONSOLE, repr=False)
+    ticks: int = 0
+    predator_wins: int = 0
+    prey_wins: int = 0
+    census: list[Census] = field(default_factory=list)
+
+    @classmethod
+    def evolve(
+        cls,
+        predators: int,
+        prey: int,
+        rng: RandomSource = random,
+        sink: EventSink = CONSOLE,
+        info: MovementInfo | None = None,
+        order: list[str] | None = None,
+    ) -> Ecosystem:
+        info = info or MovementInfo(constants.MOVE_INFO)
+        order = constants.MOVEMENT_ORDER if order is None else order
+        ecosystem = cls(sink=sink)
+        for _ in range(predators):
+            predator = FlatPredator(sink=sink)
+            predator.evolve(rng)
+            ecosystem.predators.append(
+                Agent(predator, GreedyMove(info, predator, order))
+            )
+        for _ in range(prey):
+            runner = FlatPrey(sink=sink)
+            runner.evolve(rng=rng)
+            ecosystem.prey.append(Agent(runner, GreedyMove(info, runner, order)))
+        return ecosystem
+
+    def hunters(self) -> list[Agent]:
+        return [agent for agent in self.predators if agent.creature.has_stamina()]
+
+    def step(self) -> bool:
+        hunters = self.hunters()
+        if not hunters or not self.prey:
+            return False
+
+        starts = [agent.creature.get_position() for agent in hunters]
+        for agent in hunters:
+            agent.move.move()
+        for agent in self.prey:
+            agent.move.move()
+        self.ticks += 1
+
+        for predator, prey in self.catches(hunters, starts):
+            self.engage(predator, prey)
+        self.predators = [a for a in self.predators if a.creature.has_health()]
+        self.prey = [a for a in self.prey if a.creature.has_health()]
+        self.census.append(
+            Census(self.ticks, len(self.predators), len(self.prey), len(hunters))
+        )
+        return True
+
+    def catches(
+        self, hunters: list[Agent], starts: list[int]
+    ) -> list[tuple[Agent, Agent]]:
+        index = sorted(self.prey, key=lambda agent: agent.creature.get_position())
+        positions = [agent.creature.get_position() for agent in index]
+        claimed = [False] * len(index)
+
+        pairs = []
+        for hunter, start in zip(hunters, starts):
+            lo = bisect_left(positions, start)
+            hi = bisect_right(positions, hunter.creature.get_position(), lo)
+            for i in range(lo, hi):
+                if not claimed[i]:
+                    claimed[i] = True
+                    pairs.append((hunter, index[i]))
+                    break
+        return pairs
+
+    def engage(self, predator: Agent, prey: Agent) -> None:
+        hunter, runner = predator.creature, prey.creature
+        self.sink.emit(Caught(hunter.get_position(), runner.get_position()))
+        message = Fight(runner, hunter, self.instant, self.sink).fight()
+        if message == constants.PREDATOR_WIN_MESSAGE:
+            self.predator_wins += 1
+        else:
+            self.prey_wins += 1
+
+    def run(self, max_ticks: int | None = None) -> list[Census]:
+        while max_ticks is None or self.ticks < max_ticks:
+            if not self.step():
+                break
+        return self.census
+
+
+def pairwise_catches(
+    hunters: list[Agent], starts: list[int], prey: list[Agent]
+) -> list[tuple[Agent, Agent]]:
+    claimed: set[int] = set()
+    pairs = []
+    for hunter, start in zip(hunters, starts):
+        end = hunter.creature.get_position()
+        reached = [
+            (agent.creature.get_position(), i)
+            for i, agent in enumerate(prey)
+            if i not in claimed and start <= agent.creature.get_position() <= end
+        ]
+        if reached:
+            _, i = min(reached)
+            claimed.add(i)
+            pairs.append((hunter, prey[i]))
+    return pairs
+
+
+def test_single_pair_matches_chase():
+    rng = random.Random(6)
+    for _ in range(200):
+        ecosystem = Ecosystem.evolve(1, 1, rng, NullSink())
+        predator, prey = ecosystem.predators[0], ecosystem.prey[0]
+        copies = deepcopy((predator, prey))
+        expected = Chase(
+            copies[0].creature,
+            copies[1].creature,
+            copies[0].move,
+            copies[1].move,
+            NullSink(),
+        ).chase()
+
+        ecosystem.run()
+
+        won = ecosystem.predator_wins == 1
+        assert won == (expected == constants.PREDATOR_WIN_MESSAGE)
+        assert predator.creature == copies[0].creature
+        assert prey.creature == copies[1].creature
+
+
+def test_catches_match_pairwise_check():
+    rng = random.Random(9)
+    ecosystem = Ecosystem.evolve(60, 80, rng, NullSink())
+    for _ in range(40):
+        hunters = ecosystem.hunters()
+        starts = [agent.creature.get_position() for agent in hunters]
+        for agent in hunters + ecosystem.prey:
+            agent.move.move()
+        expected = pairwise_catches(hunters, starts, ecosystem.prey)
+        actual = ecosystem.catches(hunters, starts)
+
+        assert [(id(a), a.creature.get_position()) for _, a in actual] == [
+            (id(a), a.creature.get_position()) for _, a in expected
+        ]
+        assert [id(p) for p, _ in actual] == [id(p) for p, _ in expected]
+
+
+def test_population_shrinks_until_hunt_ends():
+    ecosystem = Ecosystem.evolve(300, 300, random.Random(4), NullSink())
+
+    census = ecosystem.run()
+
+    assert census[-1].tick == ecosystem.ticks
+    assert all(a.prey >= b.prey for a, b in zip(census, census[1:]))
+    assert 300 - census[-1].prey == ecosystem.predator_wins
+    assert 300 - census[-1].predators == ecosystem.prey_wins
+    assert not ecosystem.hunters() or not ecosystem.prey
+
+
+def test_run_stops_at_max_ticks():
+    ecosystem = Ecosystem.evolve(10, 10, random.Random(1), NullSink())
+
+    assert len(ecosystem.run(3)) == 3 and ecosystem.ticks == 3
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from typing import IO, Protocol, Union
+
+from Assignment1 import constants
+
+
+@dataclass(frozen=True)
+class Evolved:
+    role: str
+    position: int
+    stamina: int
+    legs: int
+    wings: int
+    claws: int
+    teeth: int
+    health: int
+
+
+@dataclass(frozen=True)
+class Moved:
+    predator_position: int
+    prey_position: int
+    predator_stamina: int
+    prey_stamina: int
+
+
+@dataclass(frozen=True)
+class Caught:
+    predator_position: int
+    prey_position: int
+
+
+@dataclass(frozen=True)
+class Escaped:
+    predator_position: int
+    prey_position: int
+
+
+@dataclass(frozen=True)
+class FightWon:
+    message: str
+
+
+# A single trait, as reported by the per-trait log_* methods.
+@dataclass(frozen=True)
+class TraitLogged:
+    name: str
+    value: str
+
+
+Event = Union[Evolved, Moved, Caught, Escaped, FightWon, TraitLogged]
+
+
+class EventSink(Protocol):
+    records_moves: bool
+
+    def emit(self, event: Event) -> None:
+        pass
+
+
+class NullSink:
+    records_moves = False
+
+    def emit(self, event: Event) -> None:
+        pass
+
+
+class ConsoleSink:
+    records_moves = False
+
+    def emit(self, event: Event) -> None:
+        if isinstance(event, Evolved):
+            self.log_evolved(event)
+        elif isinstance(event, Escaped):
+            print(constants.PREY_WIN_MESSAGE)
+        elif isinstance(event, FightWon):
+            print(event.message)
+        elif isinstance(event, TraitLogged):
+            print(event.name + ": " + event.value)
+
+    def log_evolved(self, event: Evolved) -> None:
+        if event.role:
+            print(event.role + ":")
+        print("Position: " + str(event.position))
+        print("Stamina: " + str(event.stamina))
+        print("Legs: " + str(event.legs))
+        print("Wings: " + str(event.wings))
+        print("Claws: " + constants.CLAWS[event.claws])
+        print("Teeth sharpness: " + str(event.teeth))
+        print("Health: " + str(event.health))
+        print()
+
+
+@dataclass
+class BufferedSink:
+    records_moves: bool = True
+    events: list[Event] = field(default_factory=list)
+
+    def emit(self, event: Event) -> None:
+        self.events.append(event)
+
+    def clear(self) -> None:
+        self.events.clear()
+
+
+def to_json(event: Event) -> str:
+    return json.dumps({"event": type(event).__name__, **asdict(event)})
+
+
+@dataclass
+class FileSink:
+    file: IO[str]
+    batch_size: int = 1024
+    records_moves: bool = False
+    pending: list[str] = field(default_factory=list)
+
+    def emit(self, event: Event) -> None:
+        self.pending.append(to_json(event))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            self.file.write("\n".join(self.pending) + "\n")
+            self.pending.clear()
+        self.file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+CONSOLE = ConsoleSink()
+
+
+def test_console_sink_prints_messages(capsys):
+    CONSOLE.emit(Escaped(10, 20))
+    CONSOLE.emit(Caught(20, 20))
+    CONSOLE.emit(FightWon(constants.PREDATOR_WIN_MESSAGE))
+
+    assert capsys.readouterr().out.splitlines() == [
+        constants.PREY_WIN_MESSAGE,
+        constants.PREDATOR_WIN_MESSAGE,
+    ]
+
+
+def test_console_sink_logs_characteristics(capsys):
+    CONSOLE.emit(Evolved("Prey", 5, 100, 2, 0, 3, 1, 60))
+
+    assert capsys.readouterr().out.splitlines()[:2] == ["Prey:", "Position: 5"]
+
+
+def test_buffered_sink_keeps_events():
+    sink = BufferedSink()
+
+    sink.emit(Caught(3, 3))
+
+    assert sink.events == [Caught(3, 3)]
+
+
+def test_file_sink_writes_in_batches(tmp_path):
+    path = tmp_path / "events.jsonl"
+    sink = FileSink(open(path, "w"), batch_size=2)
+
+    sink.emit(Escaped(1, 2))
+    assert path.read_text() == ""
+    sink.emit(FightWon(constants.PREY_WIN_MESSAGE))
+    sink.emit(Caught(4, 4))
+    sink.close()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["event"] for line in lines] == ["Escaped", "FightWon", "Caught"]
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1 import constants
+from Assignment1.batch import (
+    BoolArray,
+    CreatureBatch,
+    IntArray,
+    evolved_power,
+    greedy_batch_chase,
+)
+
+FloatArray = NDArray[np.float64]
+
+GENES = {
+    "stamina": ("MIN_STAMINA", "MAX_STAMINA"),
+    "legs": ("MIN_LEGS", "MAX_LEGS"),
+    "wings": ("MIN_WINGS", "MAX_WINGS"),
+    "claws": ("MIN_CLAW", "MAX_CLAW"),
+    "teeth": ("MIN_TEETH", "MAX_TEETH"),
+    "health": ("MIN_HEALTH", "MAX_HEALTH"),
+}
+
+
+def bounds(gene: str) -> tuple[int, int]:
+    low, high = GENES[gene]
+    return getattr(constants, low), getattr(constants, high)
+
+
+@dataclass(frozen=True)
+class Generation:
+    number: int
+    predator_win_rate: float
+    predator_means: dict[str, float]
+    prey_means: dict[str, float]
+
+
+def means(batch: CreatureBatch) -> dict[str, float]:
+    return {gene: float(getattr(batch, gene).mean()) for gene in GENES}
+
+
+# Every generation pairs each creature with `matchups` random opponents and
+# runs all size * matchups pairs as one greedy batch chase. A predator's
+# fitness is the share of its matchups it won, a prey's the share it
+# survived. Prey start each matchup at a fresh random position, since
+# position is not inherited. The next generation is bred by tournament
+# selection, uniform crossover and integer creep mutation clipped to the
+# bounds in constants.
+@dataclass
+class Evolution:
+    size: int = 10_000
+    matchups: int = 2
+    tournament: int = 3
+    mutation_rate: float = 0.05
+    mutation_scale: float = 0.1
+    seed: int = 0
+    rng: np.random.Generator = field(init=False, repr=False)
+    predators: CreatureBatch = field(init=False, repr=False)
+    prey: CreatureBatch = field(init=False, repr=False)
+    history: list[Generation] = field(default_factory=list, init=False)
+
+    def __post_init__(self) -> None:
+        self.rng = np.random.default_rng(self.seed)
+        self.predators = CreatureBatch.evolve(self.size, self.rng, 0, 0)
+        self.prey = CreatureBatch.evolve(
+            self.size, self.rng, constants.MIN_POS, constants.MAX_POS
+        )
+
+    def fitness(self) -> tuple[FloatArray, FloatArray, BoolArray]:
+        rng, size = self.rng, self.size
+        predator_index = np.tile(np.arange(size), self.matchups)
+        prey_index = np.concatenate(
+            [rng.permutation(size) for _ in range(self.matchups)]
+        )
+        prey = self.prey.take(prey_index)
+        prey.position = rng.integers(
+            constants.MIN_POS, constants.MAX_POS + 1, len(prey_index)
+        )
+
+        predators = self.predators.take(predator_index)
+        won = greedy_batch_chase(predators, prey).chase().predator_won
+        predator_fitness = np.bincount(predator_index, won, size) / self.matchups
+        prey_fitness = np.bincount(prey_index, ~won, size) / self.matchups
+        return predator_fitness, prey_fitness, won
+
+    def select(self, fitness: FloatArray) -> IntArray:
+        entrants = self.rng.integers(0, self.size, (self.size, self.tournament))
+        best = np.argmax(fitness[entrants], axis=1)
+        chosen: IntArray = entrants[np.arange(self.size), best]
+        return chosen
+
+    def breed(self, batch: CreatureBatch, fitness: FloatArray) -> CreatureBatch:
+        rng = self.rng
+        first = batch.take(self.select(fitness))
+        second = batch.take(self.select(fitness))
+        child = first.take(np.arange(self.size))
+        for gene in GENES:
+            low, high = bounds(gene)
+            values = np.where(
+                rng.random(self.size) < 0.5,
+                getattr(first, gene),
+                getattr(second, gene),
+            )
+            mutated = rng.random(self.size) < self.mutation_rate
+            spread = max(1.0, self.mutation_scale * (high - low))
+            creep = np.rint(rng.normal(0, spread, self.size)).astype(np.int64)
+            setattr(child, gene, np.clip(values + mutated * creep, low, high))
+        child.power = evolved_power(child.claws, child.teeth)
+        return child
+
+    def step(self) -> Generation:
+        predator_fitness, prey_fitness, won = self.fitness()
+        generation = Generation(
+            len(self.history),
+            float(won.mean()),
+            means(self.predators),
+            means(self.prey),
+        )
+        self.history.append(generation)
+
+        self.predators = self.breed(self.predators, predator_fitness)
+        self.prey = self.breed(self.prey, prey_fitness)
+        self.prey.position = self.rng.integers(
+            constants.MIN_POS, constants.MAX_POS + 1, self.size
+        )
+        return generation
+
+    def run(self, generations: int) -> list[Generation]:
+        for _ in range(generations):
+            self.step()
+        return self.history
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Co-evolve predator and prey populations")
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--generations", type=int, default=1_000)
+    parser.add_argument("--matchups", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--every", type=int, default=50, help="report interval")
+    args = parser.parse_args(argv)
+
+    evolution = Evolution(args.size, args.matchups, seed=args.seed)
+    for _ in range(args.generations):
+        generation = evolution.step()
+        if generation.number % args.every == 0:
+            print(
+                str(generation.number)
+                + ": win rate "
+                + format(generation.predator_win_rate, ".3f")
+                + ", predator "
+                + ", ".join(
+                    gene + "=" + format(value, ".1f")
+                    for gene, value in generation.predator_means.items()
+                )
+                + ", prey "
+                + ", ".join(
+                    gene + "=" + format(value, ".1f")
+                    for gene, value in generation.prey_means.items()
+                )
+            )
+
+
+def test_genes_stay_within_bounds():
+    evolution = Evolution(300, mutation_rate=0.5, mutation_scale=0.5, seed=1)
+
+    evolution.run(5)
+
+    for batch in (evolution.predators, evolution.prey):
+        for gene in GENES:
+            low, high = bounds(gene)
+            values = getattr(batch, gene)
+            assert low <= values.min() and values.max() <= high
+        assert (batch.power == evolved_power(batch.claws, batch.teeth)).all()
+
+
+def test_evolution_is_reproducible():
+    first = Evolution(200, seed=2).run(3)
+    second = Evolution(200, seed=2).run(3)
+
+    assert first == second and len(first) == 3
+
+
+def test_selection_favours_fitter_creatures():
+    evolution = Evolution(1_000, seed=3)
+
+    history = evolution.run(15)
+
+    start, end = history[0], history[-1]
+    assert end.predator_means["stamina"] > start.predator_means["stamina"] + 100
+    assert end.prey_means["wings"] > start.prey_means["wings"]
+    assert end.predator_means["claws"] > start.predator_means["claws"]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
+from copy import deepcopy
 from dataclasses import dataclass, field
+from random import Random
+from typing import TypeVar
+
+import numpy as np
+from numpy.typing import NDArray
 
 from Assignment1 import constants
 from Assignment1.characteristics import (
@@ -10,26 +16,63 @@ from Assignment1.characteristics import (
     Teeth,
     Wings,
 )
-from Assignment1.creature import Predator, Prey
+from Assignment1.creature import CreatureInterface, Predator, Prey, random_creature
+from Assignment1.events import CONSOLE, EventSink, FightWon
+
+Strikes = TypeVar("Strikes", int, NDArray[np.int64])
+
+
+# Works on single creatures and, element-wise, on the arrays of batch fights.
+def strikes_to_kill(health: Strikes, power: Strikes) -> Strikes:
+    strikes = -(-health // power)
+    return strikes * (strikes > 0)
+
+
+@dataclass
+class FightResult:
+    message: str
+    rounds: int
 
 
 @dataclass
 class Fight:
-    prey: Prey = field(default_factory=Prey)
-    predator: Predator = field(default_factory=Predator)
+    prey: CreatureInterface = field(default_factory=Prey)
+    predator: CreatureInterface = field(default_factory=Predator)
+    instant: bool = False
+    sink: EventSink = field(default=CONSOLE, repr=False)
 
     def fight(self) -> str:
+        message = self.resolve().message if self.instant else self.exchange_attacks()
+        self.sink.emit(FightWon(message))
+        return message
+
+    def exchange_attacks(self) -> str:
         while True:
             if not self.predator.has_health():
-                print(constants.PREY_WIN_MESSAGE)
                 return constants.PREY_WIN_MESSAGE
             self.predator.attack(self.prey)
 
             if not self.prey.has_health():
-                print(constants.PREDATOR_WIN_MESSAGE)
                 return constants.PREDATOR_WIN_MESSAGE
             self.prey.attack(self.predator)
 
+    def resolve(self) -> FightResult:
+        predator_power = self.predator.get_attack_power()
+        prey_power = self.prey.get_attack_power()
+        predator_rounds = max(
+            1, strikes_to_kill(self.prey.get_health(), predator_power)
+        )
+        prey_rounds = strikes_to_kill(self.predator.get_health(), prey_power)
+
+        if predator_rounds <= prey_rounds:
+            self.prey.use_health(predator_power * predator_rounds)
+            self.predator.use_health(prey_power * (predator_rounds - 1))
+            return FightResult(constants.PREDATOR_WIN_MESSAGE, predator_rounds)
+
+        self.prey.use_health(predator_power * prey_rounds)
+        self.predator.use_health(prey_power * prey_rounds)
+        return FightResult(constants.PREY_WIN_MESSAGE, prey_rounds)
+
 
 def test_fight_predator_win():
     h = Health(50)
@@ -51,3 +94,27 @@ def test_fight_prey_win():
         Position(5), Stamina(30), Legs(1), Wings(2), Claws(2), Teeth(1), h, 7
     )
     assert Fight(prey, predator).fight() == constants.PREY_WIN_MESSAGE
+
+
+def test_instant_fight_matches_exchange_of_attacks():
+    rng = Random(5)
+    for _ in range(300):
+        prey = random_creature(Prey, rng, 5)
+        predator = random_creature(Predator, rng, 5)
+        for fighter in (prey, predator):
+            fighter.use_health(rng.randint(0, constants.MAX_HEALTH + 5))
+        expected_prey, expected_predator = deepcopy(prey), deepcopy(predator)
+
+        message = Fight(prey, predator, instant=True).fight()
+
+        assert message == Fight(expected_prey, expected_predator).fight()
+        assert prey == expected_prey and predator == expected_predator
+
+
+def test_resolve_rounds():
+    prey = Prey(Position(5), Stamina(20), health=Health(50))
+    predator = Predator(Position(5), Stamina(30), health=Health(40))
+
+    result = Fight(prey, predator).resolve()
+
+    assert result == FightResult(constants.PREDATOR_WIN_MESSAGE, 4)
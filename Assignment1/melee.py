@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import heapq
+from copy import deepcopy
+from dataclasses import dataclass, field
+from random import Random
+from typing import Sequence
+
+from Assignment1 import constants
+from Assignment1.creature import CreatureInterface, FlatPredator, FlatPrey
+from Assignment1.fight import Fight, strikes_to_kill
+
+PREDATOR, PREY = 0, 1
+
+
+# Fights run in rounds, as in Fight: the predators' half of round r happens at
+# time 2r - 1 and the prey's half at time 2r, so prey killed in the predators'
+# half die before any predator of the same round. In its side's half, every
+# fighter strikes the first opponent it is engaged with that is still alive.
+# Fighters struck to no health die together at the end of the half-round.
+def strikes_between(side: int, start: int, end: int) -> int:
+    if side == PREY:
+        return (end + 1) // 2 - (start + 1) // 2
+    return end // 2 - start // 2
+
+
+def strike_time(side: int, after: int, strikes: int) -> int:
+    first = 2 * ((after + 1) // 2) + 1 if side == PREY else 2 * (after // 2) + 2
+    return first + 2 * (strikes - 1)
+
+
+@dataclass(slots=True)
+class Fighter:
+    side: int
+    health: int
+    power: int
+    opponents: list[int] = field(default_factory=list)
+    target: int = 0
+    incoming: int = 0
+    settled: int = 0
+    version: int = 0
+    death: int | None = None
+
+
+@dataclass
+class Melee:
+    predator_health: list[int]
+    prey_health: list[int]
+    predator_deaths: list[int | None]
+    prey_deaths: list[int | None]
+
+    def rounds(self) -> int:
+        times = [t for t in self.predator_deaths + self.prey_deaths if t is not None]
+        return (max(times, default=0) + 1) // 2
+
+
+# Rather than stepping round by round, each fighter's health only changes when
+# the total power striking it does, and its death is scheduled in a heap keyed
+# by the half-round it will be killed in at the current rate. When fighters
+# die, their attackers move on to their next opponent and the fighters whose
+# incoming power changed are settled and rescheduled; stale heap entries are
+# skipped by version. Predators starting without health lose at once, as in
+# Fight, and a prey is always struck at least once.
+def resolve_melee(
+    predator_health: Sequence[int],
+    predator_power: Sequence[int],
+    prey_health: Sequence[int],
+    prey_power: Sequence[int],
+    engagements: Sequence[tuple[int, int]],
+) -> Melee:
+    fighters = [
+        Fighter(PREDATOR, health, power)
+        for health, power in zip(predator_health, predator_power)
+    ]
+    offset = len(fighters)
+    fighters += [
+        Fighter(PREY, health, power) for health, power in zip(prey_health, prey_power)
+    ]
+    for predator, prey in engagements:
+        fighters[predator].opponents.append(offset + prey)
+        fighters[offset + prey].opponents.append(predator)
+    heap: list[tuple[int, int, int]] = []
+    changed: set[int] = set()
+
+    def settle(fighter: Fighter, time: int) -> None:
+        strikes = strikes_between(fighter.side, fighter.settled, time)
+        fighter.health -= strikes * fighter.incoming
+        fighter.settled = time
+
+    def schedule(i: int, time: int) -> None:
+        fighter = fighters[i]
+        fighter.version += 1
+        if fighter.incoming > 0:
+            strikes = max(1, strikes_to_kill(fighter.health, fighter.incoming))
+            death = strike_time(fighter.side, time, strikes)
+            heapq.heappush(heap, (death, i, fighter.version))
+
+    def aim(fighter: Fighter, time: int) -> int | None:
+        opponents = fighter.opponents
+        while (
+            fighter.target < len(opponents)
+            and fighters[opponents[fighter.target]].death is not None
+        ):
+            fighter.target += 1
+        if fighter.target == len(opponents):
+            return None
+        target = fighters[opponents[fighter.target]]
+        settle(target, time)
+        target.incoming += fighter.power
+        return opponents[fighter.target]
+
+    for fighter in fighters[:offset]:
+        if fighter.opponents and fighter.health <= 0:
+            fighter.death = 0
+    for fighter in fighters:
+        aimed = aim(fighter, 0) if fighter.death is None else None
+        if aimed is not None:
+            changed.add(aimed)
+    for i in changed:
+        schedule(i, 0)
+
+    while heap:
+        time = heap[0][0]
+        dying = []
+        while heap and heap[0][0] == time:
+            _, i, version = heapq.heappop(heap)
+            if fighters[i].version == version and fighters[i].death is None:
+                dying.append(i)
+        for i in dying:
+            settle(fighters[i], time)
+            fighters[i].death = time
+
+        changed.clear()
+        for i in dying:
+            fighter = fighters[i]
+            if fighter.target < len(fighter.opponents):
+                target = fighters[fighter.opponents[fighter.target]]
+                if target.death is None:
+                    settle(target, time)
+                    target.incoming -= fighter.power
+                    changed.add(fighter.opponents[fighter.target])
+            for j in fighter.opponents:
+                attacker = fighters[j]
+                if attacker.death is not None:
+                    continue
+                opponents = attacker.opponents
+                if attacker.target < len(opponents) and opponents[attacker.target] == i:
+                    aimed = aim(attacker, time)
+                    if aimed is not None:
+                        changed.add(aimed)
+        for i in changed:
+            if fighters[i].death is None:
+                schedule(i, time)
+
+    return Melee(
+        [f.health for f in fighters[:offset]],
+        [f.health for f in fighters[offset:]],
+        [f.death for f in fighters[:offset]],
+        [f.death for f in fighters[offset:]],
+    )
+
+
+# Collects the engagements of a tick and resolves them together, writing each
+# creature's health back once. Each side indexes its creatures by id, so the
+# two sides never share slots.
+@dataclass
+class FightScheduler:
+    predators: list[CreatureInterface] = field(default_factory=list)
+    prey: list[CreatureInterface] = field(default_factory=list)
+    engagements: list[tuple[int, int]] = field(default_factory=list)
+    predator_index: dict[int, int] = field(default_factory=dict, repr=False)
+    prey_index: dict[int, int] = field(default_factory=dict, repr=False)
+
+    def engage(self, predator: CreatureInterface, prey: CreatureInterface) -> None:
+        self.engagements.append(
+            (
+                self.add(self.predators, self.predator_index, predator),
+                self.add(self.prey, self.prey_index, prey),
+            )
+        )
+
+    def add(
+        self,
+        side: list[CreatureInterface],
+        index: dict[int, int],
+        creature: CreatureInterface,
+    ) -> int:
+        if id(creature) not in index:
+            index[id(creature)] = len(side)
+            side.append(creature)
+        return index[id(creature)]
+
+    def resolve(self) -> Melee:
+        melee = resolve_melee(
+            [c.get_health() for c in self.predators],
+            [c.get_attack_power() for c in self.predators],
+            [c.get_health() for c in self.prey],
+            [c.get_attack_power() for c in self.prey],
+            self.engagements,
+        )
+        for creatures, health in (
+            (self.predators, melee.predator_health),
+            (self.prey, melee.prey_health),
+        ):
+            for creature, after in zip(creatures, health):
+                creature.use_health(creature.get_health() - after)
+        self.predators, self.prey, self.engagements = [], [], []
+        self.predator_index, self.prey_index = {}, {}
+        return melee
+
+
+def step_rounds(
+    predator_health: list[int],
+    predator_power: list[int],
+    prey_health: list[int],
+    prey_power: list[int],
+    engagements: list[tuple[int, int]],
+) -> tuple[list[int], list[int]]:
+    health = [list(predator_health), list(prey_health)]
+    power = [predator_power, prey_power]
+    opponents: list[list[list[int]]] = [
+        [[] for _ in predator_health],
+        [[] for _ in prey_health],
+    ]
+    for predator, prey in engagements:
+        opponents[PREDATOR][predator].append(prey)
+        opponents[PREY][prey].append(predator)
+    alive = [
+        [not opponents[PREDATOR][i] or h > 0 for i, h in enumerate(predator_health)],
+        [True] * len(prey_health),
+    ]
+
+    while True:
+        struck = False
+        for side in (PREDATOR, PREY):
+            other = 1 - side
+            damage = [0] * len(health[other])
+            for i, targets in enumerate(opponents[side]):
+                living = [j for j in targets if alive[other][j]]
+                if alive[side][i] and living:
+                    damage[living[0]] += power[side][i]
+                    struck = struck or power[side][i] > 0
+            for j, amount in enumerate(damage):
+                health[other][j] -= amount
+                if amount and health[other][j] <= 0:
+                    alive[other][j] = False
+        if not struck:
+            return health[PREDATOR], health[PREY]
+
+
+def test_single_fight_matches_fight():
+    rng = Random(1)
+    for _ in range(300):
+        predator = FlatPredator(0, 1, 0, 0, 1, 1, rng.randint(-5, 100))
+        predator.power = rng.randint(1, 30)
+        prey = FlatPrey(0, 1, 0, 0, 1, 1, rng.randint(-5, 100))
+        prey.power = rng.randint(1, 30)
+        expected = deepcopy((predator, prey))
+        message = Fight(expected[1], expected[0], instant=True).fight()
+
+        scheduler = FightScheduler()
+        scheduler.engage(predator, prey)
+        melee = scheduler.resolve()
+
+        assert (predator, prey) == expected
+        won = melee.prey_deaths[0] is not None
+        assert won == (message == constants.PREDATOR_WIN_MESSAGE)
+
+
+def test_melee_matches_stepped_rounds():
+    rng = Random(2)
+    for _ in range(200):
+        predators, prey = rng.randint(1, 6), rng.randint(1, 6)
+        predator_health = [rng.randint(-3, 60) for _ in range(predators)]
+        predator_power = [rng.randint(1, 20) for _ in range(predators)]
+        prey_health = [rng.randint(-3, 60) for _ in range(prey)]
+        prey_power = [rng.randint(1, 20) for _ in range(prey)]
+        sides = (predator_health, predator_power, prey_health, prey_power)
+        pairs = {
+            (rng.randrange(predators), rng.randrange(prey))
+            for _ in range(rng.randint(1, 10))
+        }
+        engagements = sorted(pairs, key=lambda _: rng.random())
+
+        melee = resolve_melee(*sides, engagements)
+
+        assert (melee.predator_health, melee.prey_health) == tuple(
+            step_rounds(*sides, engagements)
+        )
+
+
+def test_scheduler_updates_each_creature_once():
+    writes = []
+
+    class Counted(FlatPrey):
+        def use_health(self, value: int) -> None:
+            writes.append(value)
+            FlatPrey.use_health(self, value)
+
+    prey = Counted(0, 1, 0, 0, 1, 1, 200)
+    prey.power = 1
+    predators = [FlatPredator(0, 1, 0, 0, 1, 1, 100) for _ in range(3)]
+    scheduler = FightScheduler()
+    for predator in predators:
+        predator.power = 10
+        scheduler.engage(predator, prey)
+
+    melee = scheduler.resolve()
+
+    assert writes == [210] and prey.get_health() == -10
+    assert melee.prey_deaths == [13] and melee.rounds() == 7
+    assert [p.get_health() for p in predators] == [94, 100, 100]
+    assert scheduler.engagements == [] and scheduler.predators == []
+
+
+def test_scheduler_indexes_each_side_separately():
+    first, second, third = (FlatPrey(0, 1, 0, 0, 1, 1, 50) for _ in range(3))
+    scheduler = FightScheduler()
+
+    scheduler.engage(first, second)
+    scheduler.engage(second, third)
+
+    assert scheduler.engagements == [(0, 0), (1, 1)]
+    assert scheduler.predators == [first, second] and scheduler.prey == [second, third]
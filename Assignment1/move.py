@@ -1,33 +1,43 @@
 from __future__ import annotations
 
+import random
+from collections import Counter
 from dataclasses import dataclass, field
-from random import randint
 from typing import Protocol
 
 from Assignment1 import constants
-from Assignment1.creature import Creature, Legs, Position, Stamina, Wings
-from Assignment1.movement_info import MovementInfo
+from Assignment1.characteristics import RandomSource
+from Assignment1.creature import (
+    Creature,
+    CreatureInterface,
+    Legs,
+    Position,
+    Stamina,
+    Wings,
+)
+from Assignment1.movement_info import Choices, Ladder, MovementInfo, Step
 
 
 class MoveInterface(Protocol):
-    def move(self, movement: str = "") -> bool | None:
+    def move(self, movement: str = "") -> Step | None:
         pass
 
 
 @dataclass
 class Move:
     info: MovementInfo
-    creature: Creature = field(default_factory=Creature)
+    creature: CreatureInterface = field(default_factory=Creature)
 
-    def move(self, movement: str = "") -> bool:
+    def move(self, movement: str = "") -> Step | None:
         if movement in constants.MOVEMENT_ORDER and self.info.can_do_movement(
             self.creature, movement
         ):
-            self.creature.use_stamina(self.info.get_stamina_use(movement))
-            self.creature.increment_position(self.info.get_speed(movement))
-            return True
+            step = self.info.get_step(movement)
+            self.creature.use_stamina(step.stamina_use)
+            self.creature.increment_position(step.speed)
+            return step
 
-        return False
+        return None
 
     def crawl(self) -> None:
         self.move("crawl")
@@ -46,34 +56,61 @@ class Move:
 
 
 class NoMove:
-    def move(self, movement: str = "") -> bool | None:
+    def move(self, movement: str = "") -> Step | None:
         pass
 
 
+# The ladder is resolved once, for the creature's body when the move is made,
+# so each tick is one lookup on the current stamina. Bodies do not change
+# during a chase.
 @dataclass
 class GreedyMove(Move):
     greedy_order: list[str] = field(default_factory=list)
-
-    def move(self, movement: str = ""):
-        for i in range(0, len(self.greedy_order)):
-            movement = self.greedy_order[i]
-            if super().move(movement):
-                return
-
-
+    ladder: Ladder = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        creature = self.creature
+        self.ladder = self.info.get_ladder(
+            self.greedy_order, creature.get_num_legs(), creature.get_num_wings()
+        )
+
+    def move(self, movement: str = "") -> Step | None:
+        creature = self.creature
+        step = self.ladder.select(creature.get_stamina())
+        if step is not None:
+            creature.use_stamina(step.stamina_use)
+            creature.increment_position(step.speed)
+        return step
+
+
+# Each tick with stamina left makes exactly one draw, over the entries of
+# random_order the creature can currently perform. An entry is picked with
+# probability weight / (sum of feasible weights); weights default to 1, so
+# unweighted moves are uniform over feasible entries, as with rejection.
 @dataclass
 class RandomMove(Move):
     random_order: list[str] = field(default_factory=list)
+    weights: dict[str, float] = field(default_factory=dict)
+    rng: RandomSource = field(default=random, repr=False, compare=False)
+
+    def move(self, movement: str = "") -> Step | None:
+        creature = self.creature
+        if not creature.has_stamina():
+            return None
 
-    def move(self, movement: str = ""):
-        if not self.creature.has_stamina():
-            return
+        step = self.choices().sample(creature.get_stamina(), self.rng.random())
+        if step is not None:
+            creature.use_stamina(step.stamina_use)
+            creature.increment_position(step.speed)
+        return step
 
-        while True:
-            i = randint(0, len(self.random_order) - 1)
-            movement = self.random_order[i]
-            if super().move(movement):
-                return
+    def choices(self) -> Choices:
+        return self.info.get_choices(
+            self.random_order,
+            [self.weights.get(m, 1.0) for m in self.random_order],
+            self.creature.get_num_legs(),
+            self.creature.get_num_wings(),
+        )
 
 
 def test_incorrect_movement():
@@ -84,6 +121,14 @@ def test_incorrect_movement():
     assert creature.get_position() == 0 and creature.get_stamina() == 1
 
 
+def test_move_returns_the_step_taken():
+    creature = Creature(Position(0), Stamina(50), Legs(2), Wings(0))
+    move = Move(MovementInfo(constants.MOVE_INFO), creature)
+
+    assert move.move("walk") == MovementInfo(constants.MOVE_INFO).get_step("walk")
+    assert move.move("fly") is None and creature.get_position() == 4
+
+
 def test_crawl():
     creature = Creature(Position(0), Stamina(1), Legs(0), Wings(0))
 
@@ -256,6 +301,18 @@ def test_greedy_move_does_nothing():
     assert creature.get_position() == 0 and creature.get_stamina() == 0
 
 
+def test_greedy_move_resolves_its_ladder_once():
+    info = MovementInfo(constants.MOVE_INFO)
+    creature = Creature(Position(0), Stamina(100), Legs(2), Wings(0))
+    move = GreedyMove(info, creature, constants.MOVEMENT_ORDER)
+    info.ladders.clear()
+
+    steps = [move.move() for _ in range(3)]
+
+    assert [step.movement for step in steps if step] == ["run"] * 3
+    assert info.ladders == {}
+
+
 def test_random_move():
     creature = Creature(Position(5), Stamina(100), Legs(1), Wings(2))
 
@@ -288,3 +345,55 @@ def test_random_does_nothing():
     ).move()
 
     assert creature.get_position() == 10 and creature.get_stamina() == 0
+
+
+@dataclass
+class CountingRandom:
+    draws: int = 0
+
+    def randint(self, a: int, b: int) -> int:
+        self.draws += 1
+        return a
+
+    def random(self) -> float:
+        self.draws += 1
+        return 0.0
+
+
+def test_random_move_draws_once_per_tick():
+    creature = Creature(Position(0), Stamina(15), Legs(1), Wings(2))
+    rng = CountingRandom()
+    move = RandomMove(
+        MovementInfo(constants.MOVE_INFO), creature, constants.MOVEMENT_ORDER, rng=rng
+    )
+
+    for _ in range(20):
+        move.move()
+
+    assert rng.draws == 15 and creature.get_position() == 15
+
+
+def test_random_move_follows_weights():
+    creature = Creature(Position(0), Stamina(10**6), Legs(2), Wings(0))
+    move = RandomMove(
+        MovementInfo(constants.MOVE_INFO),
+        creature,
+        ["walk", "crawl"],
+        {"walk": 3.0},
+        random.Random(2),
+    )
+    speeds: Counter[int] = Counter()
+    for _ in range(4000):
+        before = creature.get_position()
+        move.move()
+        speeds[creature.get_position() - before] += 1
+
+    assert 0.72 < speeds[4] / 4000 < 0.78 and speeds[4] + speeds[1] == 4000
+
+
+def test_random_move_without_feasible_entry_does_nothing():
+    creature = Creature(Position(0), Stamina(10), Legs(0), Wings(0))
+
+    RandomMove(MovementInfo(constants.MOVE_INFO), creature, ["hop"]).move()
+
+    assert creature.get_position() == 0 and creature.get_stamina() == 10
@@ -1,13 +1,79 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Sequence
 
 from Assignment1 import constants
 from Assignment1.characteristics import Legs, Position, Stamina, Wings
-from Assignment1.creature import Creature
+from Assignment1.creature import Creature, CreatureInterface
+
+
+@dataclass(frozen=True)
+class Step:
+    movement: str
+    required_stamina: int
+    stamina_use: int
+    speed: int
+
+
+@dataclass
+class Ladder:
+    steps: list[Step] = field(default_factory=list)
+    table: list[Step | None] = field(init=False, repr=False)
+    top: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.top = max((step.required_stamina for step in self.steps), default=0)
+        self.table = [self.scan(stamina) for stamina in range(-1, self.top + 1)]
+
+    def scan(self, stamina: int) -> Step | None:
+        for step in self.steps:
+            if stamina >= step.required_stamina:
+                return step
+        return None
+
+    def select(self, stamina: int) -> Step | None:
+        return self.table[max(-1, min(stamina, self.top)) + 1]
+
+
+@dataclass
+class Choices:
+    options: list[tuple[Step, float]] = field(default_factory=list)
+    table: list[tuple[list[Step], list[float]]] = field(init=False, repr=False)
+    top: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.top = max((step.required_stamina for step, _ in self.options), default=0)
+        self.table = [self.feasible(stamina) for stamina in range(-1, self.top + 1)]
+
+    def feasible(self, stamina: int) -> tuple[list[Step], list[float]]:
+        options = [
+            (step, weight)
+            for step, weight in self.options
+            if stamina >= step.required_stamina and weight > 0
+        ]
+        return [step for step, _ in options], list(accumulate(w for _, w in options))
+
+    def sample(self, stamina: int, uniform: float) -> Step | None:
+        steps, cumulative = self.table[max(-1, min(stamina, self.top)) + 1]
+        if not steps:
+            return None
+        # uniform * total can round up to total itself for uniform just below 1.
+        index = bisect_right(cumulative, uniform * cumulative[-1])
+        return steps[min(index, len(steps) - 1)]
 
 
 @dataclass
 class MovementInfo:
     move_info: dict[str, tuple[int, int, int, int, int]]
+    ladders: dict[tuple[tuple[str, ...], int, int], Ladder] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    choices: dict[tuple[tuple[str, ...], tuple[float, ...], int, int], Choices] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def get_required_stamina(self, movement: str) -> int:
         return self.move_info[movement][0]
@@ -24,22 +90,74 @@ class MovementInfo:
     def get_num_wing_required(self, movement: str) -> int:
         return self.move_info[movement][4]
 
-    def enough_wings(self, creature: Creature, movement: str) -> bool:
+    def enough_wings(self, creature: CreatureInterface, movement: str) -> bool:
         return creature.get_num_wings() >= self.get_num_wing_required(movement)
 
-    def enough_legs(self, creature: Creature, movement: str) -> bool:
+    def enough_legs(self, creature: CreatureInterface, movement: str) -> bool:
         return creature.get_num_legs() >= self.get_num_legs_required(movement)
 
-    def enough_stamina(self, creature: Creature, movement: str) -> bool:
+    def enough_stamina(self, creature: CreatureInterface, movement: str) -> bool:
         return creature.get_stamina() >= self.get_required_stamina(movement)
 
-    def can_do_movement(self, creature: Creature, movement: str) -> bool:
+    def can_do_movement(self, creature: CreatureInterface, movement: str) -> bool:
         return (
             self.enough_stamina(creature, movement)
             and self.enough_legs(creature, movement)
             and self.enough_wings(creature, movement)
         )
 
+    def get_ladder(self, order: Sequence[str], legs: int, wings: int) -> Ladder:
+        key = (tuple(order), legs, wings)
+        if key not in self.ladders:
+            self.ladders[key] = self.build_ladder(order, legs, wings)
+        return self.ladders[key]
+
+    def build_ladder(self, order: Sequence[str], legs: int, wings: int) -> Ladder:
+        steps: list[Step] = []
+        for movement in self.body_feasible(order, legs, wings):
+            required = self.get_required_stamina(movement)
+            if not steps or required < steps[-1].required_stamina:
+                steps.append(self.get_step(movement))
+        return Ladder(steps)
+
+    def get_choices(
+        self, order: Sequence[str], weights: Sequence[float], legs: int, wings: int
+    ) -> Choices:
+        key = (tuple(order), tuple(weights), legs, wings)
+        if key not in self.choices:
+            feasible = self.body_feasible(order, legs, wings)
+            self.choices[key] = Choices(
+                [
+                    (self.get_step(movement), weight)
+                    for movement, weight in zip(order, weights)
+                    if movement in feasible
+                ]
+            )
+        return self.choices[key]
+
+    def body_feasible(self, order: Sequence[str], legs: int, wings: int) -> list[str]:
+        return [
+            movement
+            for movement in order
+            if movement in constants.MOVEMENT_ORDER
+            and legs >= self.get_num_legs_required(movement)
+            and wings >= self.get_num_wing_required(movement)
+        ]
+
+    def get_step(self, movement: str) -> Step:
+        return Step(
+            movement,
+            self.get_required_stamina(movement),
+            self.get_stamina_use(movement),
+            self.get_speed(movement),
+        )
+
+    def select_movement(
+        self, order: Sequence[str], stamina: int, legs: int, wings: int
+    ) -> str | None:
+        step = self.get_ladder(order, legs, wings).select(stamina)
+        return None if step is None else step.movement
+
 
 def test_get_required_stamina():
     assert MovementInfo(constants.MOVE_INFO).get_required_stamina("fly") == 80
@@ -75,3 +193,65 @@ def test_enough_legs():
 def test_enough_stamina():
     c = Creature(Position(10), Stamina(20), Legs(1), Wings(0))
     assert MovementInfo(constants.MOVE_INFO).enough_stamina(c, "hop") is True
+
+
+def test_select_movement():
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+
+    assert info.select_movement(order, 70, 2, 3) == "run"
+    assert info.select_movement(order, 0, 2, 3) is None
+
+
+def test_ladder_keeps_only_reachable_moves():
+    ladder = MovementInfo(constants.MOVE_INFO).get_ladder(
+        ["walk", "run", "hop", "crawl"], 2, 0
+    )
+
+    assert [step.movement for step in ladder.steps] == ["walk", "hop", "crawl"]
+
+
+def test_ladder_select():
+    ladder = MovementInfo(constants.MOVE_INFO).get_ladder(
+        constants.MOVEMENT_ORDER, 1, 2
+    )
+
+    assert [ladder.select(s).movement for s in (500, 80, 79, 20, 1)] == [
+        "fly",
+        "fly",
+        "hop",
+        "hop",
+        "crawl",
+    ]
+    assert ladder.select(0) is None and ladder.select(-3) is None
+
+
+def test_choices_sample_only_feasible_moves():
+    choices = MovementInfo(constants.MOVE_INFO).get_choices(
+        constants.MOVEMENT_ORDER, [1.0] * 5, 2, 0
+    )
+
+    assert {choices.sample(45, u / 10).movement for u in range(10)} == {
+        "walk",
+        "hop",
+        "crawl",
+    }
+    assert choices.sample(10, 0.99).movement == "crawl"
+    assert choices.sample(0, 0.5) is None
+
+
+def test_choices_respect_weights():
+    choices = MovementInfo(constants.MOVE_INFO).get_choices(
+        ["hop", "crawl"], [3.0, 1.0], 1, 0
+    )
+
+    assert choices.sample(30, 0.74).movement == "hop"
+    assert choices.sample(30, 0.75).movement == "crawl"
+
+
+def test_choices_sample_keeps_the_top_of_the_range():
+    choices = MovementInfo(constants.MOVE_INFO).get_choices(
+        ["hop", "crawl"], [3.0, 1.0], 1, 0
+    )
+
+    assert choices.sample(30, 1.0).movement == "crawl"
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1 import constants
+from Assignment1.atomic import atomic_write
+from Assignment1.cache import LRUCache
+from Assignment1.characteristics import Legs, Position, Stamina, Wings
+from Assignment1.chase import Chase
+from Assignment1.creature import Creature, CreatureInterface
+from Assignment1.events import NullSink
+from Assignment1.move import GreedyMove, Move
+from Assignment1.movement_info import MovementInfo, Step
+
+IntArray = NDArray[np.int64]
+MoveArray = NDArray[np.int8]
+
+REST = -1
+UNREACHABLE = 1 << 40
+
+
+def table_key(info: MovementInfo) -> str:
+    text = json.dumps(
+        [
+            sorted(info.move_info.items()),
+            constants.MOVEMENT_ORDER,
+            constants.MAX_STAMINA,
+        ]
+    )
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+# A body is summed up by the moves its legs and wings allow, as a bit mask
+# over MOVEMENT_ORDER.
+def body_mask(info: MovementInfo, legs: int, wings: int) -> int:
+    return sum(
+        1 << index
+        for index, movement in enumerate(constants.MOVEMENT_ORDER)
+        if legs >= info.get_num_legs_required(movement)
+        and wings >= info.get_num_wing_required(movement)
+    )
+
+
+def body_moves(info: MovementInfo, mask: int) -> list[tuple[int, Step]]:
+    return [
+        (index, info.get_step(movement))
+        for index, movement in enumerate(constants.MOVEMENT_ORDER)
+        if mask >> index & 1
+    ]
+
+
+# speed[s] and use[s] of the move a greedy creature with this body makes on
+# stamina s, or 0 and 0 when it has none.
+def greedy_steps(info: MovementInfo, mask: int) -> tuple[IntArray, IntArray]:
+    stamina = np.arange(constants.MAX_STAMINA + 1)
+    speed, use = np.zeros_like(stamina), np.zeros_like(stamina)
+    for _, step in reversed(body_moves(info, mask)):
+        able = stamina >= step.required_stamina
+        speed[able], use[able] = step.speed, step.stamina_use
+    return speed, use
+
+
+def check_moves(info: MovementInfo) -> None:
+    for movement in constants.MOVEMENT_ORDER:
+        use = info.get_stamina_use(movement)
+        if not 1 <= use <= info.get_required_stamina(movement):
+            raise ValueError(movement + " must use between 1 and its required stamina")
+
+
+# The prey's lead over a chase is its start gap plus the running sum of
+# (prey speed - predator speed), and the chase is decided by the smallest
+# lead at any catch check. Against a greedy predator a prey escapes exactly
+# when its start gap plus the best achievable minimum of that running sum
+# is positive, so maximising the minimum is optimal whatever the gap. The
+# predator moves first each tick, so the prey decides on the predator's
+# stamina after that move. value[after, own] is the best minimum, counted
+# from the prey's move on. Resting is allowed but loses ties to moving.
+def prey_table(info: MovementInfo, own: int, opponent: int) -> MoveArray:
+    size = constants.MAX_STAMINA + 1
+    stamina = np.arange(size)
+    speed, use = greedy_steps(info, opponent)
+    moves = np.full((size, size), REST, dtype=np.int8)
+    value = np.zeros((size, size), dtype=np.int64)
+    ended = np.full(size, UNREACHABLE, dtype=np.int64)
+    for after in range(size):
+        future = ended if use[after] == 0 else value[after - use[after]] - speed[after]
+        later = np.minimum(future, 0)
+        best = np.full(size, -UNREACHABLE, dtype=np.int64)
+        for index, step in body_moves(info, own):
+            reach = step.speed + later[np.maximum(stamina - step.stamina_use, 0)]
+            better = (stamina >= step.required_stamina) & (reach > best)
+            best[better], moves[after][better] = reach[better], index
+        better = later > best
+        best[better], moves[after][better] = later[better], REST
+        value[after] = best
+    return np.ascontiguousarray(moves.T)
+
+
+# The predator's mirror image: against a greedy prey it minimises the same
+# running sum, from the state at the start of a tick, and catches exactly
+# when the start gap plus that minimum is at most zero. A predator never
+# rests, since that would only hand the prey more lead.
+def predator_table(info: MovementInfo, own: int, opponent: int) -> MoveArray:
+    size = constants.MAX_STAMINA + 1
+    speed, use = greedy_steps(info, opponent)
+    after = np.arange(size) - use
+    moves = np.full((size, size), REST, dtype=np.int8)
+    value = np.full((size, size), UNREACHABLE, dtype=np.int64)
+    for stamina in range(1, size):
+        best = value[stamina]
+        for index, step in body_moves(info, own):
+            if stamina < step.required_stamina:
+                continue
+            later = np.minimum(value[stamina - step.stamina_use][after], 0)
+            reach = speed - step.speed + later
+            better = reach < best
+            best[better], moves[stamina][better] = reach[better], index
+    return moves
+
+
+def table_name(info: MovementInfo, hunting: bool, own: int, opponent: int) -> str:
+    side = "predator" if hunting else "prey"
+    return "-".join(["policy", table_key(info), side, str(own), str(opponent)])
+
+
+# Each table holds (MAX_STAMINA + 1) ** 2 moves, so only the most recently
+# used ones stay in memory.
+TABLES: LRUCache[MoveArray] = LRUCache(capacity=32)
+
+
+# moves[own stamina, opponent stamina] is the index into MOVEMENT_ORDER of
+# the move to make, or REST. Tables are built per pair of bodies on first
+# use and kept in memory and, given a directory, on disk.
+def policy_table(
+    info: MovementInfo,
+    hunting: bool,
+    own: int,
+    opponent: int,
+    directory: Path | None = None,
+) -> MoveArray:
+    name = table_name(info, hunting, own, opponent)
+    moves = TABLES.get(name)
+    if moves is None:
+        path = None if directory is None else directory / (name + ".npy")
+        if path is not None and path.exists():
+            moves = np.load(path)
+        else:
+            check_moves(info)
+            build = predator_table if hunting else prey_table
+            moves = build(info, own, opponent)
+            if path is not None:
+                save_table(path, moves)
+        TABLES.put(name, moves)
+    return moves
+
+
+def save_table(path: Path, moves: MoveArray) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path) as file:
+        np.save(file, moves)
+
+
+# Each tick is one lookup on the two creatures' staminas, which assumes the
+# bodies do not change during the chase. The policy is the best response to
+# a greedy opponent: a prey escapes, and a predator catches, whenever the
+# greedy move would have, and sometimes when it would not.
+@dataclass
+class PolicyMove(Move):
+    opponent: CreatureInterface = field(default_factory=Creature)
+    hunting: bool = False
+    directory: Path | None = field(default=None, repr=False, compare=False)
+    table: MoveArray = field(init=False, repr=False, compare=False)
+    steps: list[Step | None] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        info, creature, opponent = self.info, self.creature, self.opponent
+        self.table = policy_table(
+            info,
+            self.hunting,
+            body_mask(info, creature.get_num_legs(), creature.get_num_wings()),
+            body_mask(info, opponent.get_num_legs(), opponent.get_num_wings()),
+            self.directory,
+        )
+        self.steps = [info.get_step(m) for m in constants.MOVEMENT_ORDER] + [None]
+
+    def move(self, movement: str = "") -> Step | None:
+        creature = self.creature
+        stamina = creature.get_stamina()
+        if stamina <= 0:
+            return None
+        # An opponent out of stamina cannot move, whatever its exact count.
+        opponent = max(self.opponent.get_stamina(), 0)
+        if max(stamina, opponent) > constants.MAX_STAMINA:
+            raise ValueError("stamina is beyond the policy table")
+
+        step: Step | None = self.steps[self.table[stamina, opponent]]
+        if step is not None:
+            creature.use_stamina(step.stamina_use)
+            creature.increment_position(step.speed)
+        return step
+
+
+def creature(stamina: int, legs: int, wings: int, position: int = 0) -> Creature:
+    return Creature(
+        Position(position), Stamina(stamina), Legs(legs), Wings(wings), sink=NullSink()
+    )
+
+
+def caught(
+    predator: Creature, prey: Creature, hunter: bool, runner: bool, directory: Path
+) -> bool:
+    info, order = MovementInfo(constants.MOVE_INFO), constants.MOVEMENT_ORDER
+    predator_move, prey_move = (
+        (
+            PolicyMove(info, body, other, body is predator, directory)
+            if policy
+            else GreedyMove(info, body, order)
+        )
+        for body, other, policy in [(predator, prey, hunter), (prey, predator, runner)]
+    )
+    message = Chase(predator, prey, predator_move, prey_move, NullSink()).chase()
+    return message != constants.PREY_WIN_MESSAGE
+
+
+def test_policy_matches_exhaustive_search(tmp_path):
+    from Assignment1.sweep import patched
+
+    info = MovementInfo(constants.MOVE_INFO)
+    rng = random.Random(1)
+
+    rest = Step("rest", 0, 0, 0)
+
+    def greedy(stamina: int, legs: int, wings: int) -> Step:
+        body = creature(stamina, legs, wings)
+        return GreedyMove(info, body, constants.MOVEMENT_ORDER).move() or rest
+
+    def options(stamina: int, legs: int, wings: int) -> list[Step]:
+        body = creature(stamina, legs, wings)
+        return [
+            info.get_step(m)
+            for m in constants.MOVEMENT_ORDER
+            if info.can_do_movement(body, m)
+        ]
+
+    @lru_cache(maxsize=None)
+    def can_escape(hunter: tuple[int, int, int], runner: tuple[int, int, int], lead):
+        if hunter[0] <= 0:
+            return True
+        chase = greedy(*hunter)
+        hunter = (hunter[0] - chase.stamina_use, *hunter[1:])
+        return any(
+            lead - chase.speed + step.speed > 0
+            and can_escape(
+                hunter,
+                (runner[0] - step.stamina_use, *runner[1:]),
+                lead - chase.speed + step.speed,
+            )
+            for step in options(*runner) + [rest]
+        )
+
+    @lru_cache(maxsize=None)
+    def can_catch(hunter: tuple[int, int, int], runner: tuple[int, int, int], lead):
+        flee = greedy(*runner)
+        runner = (runner[0] - flee.stamina_use, *runner[1:])
+        return any(
+            lead - step.speed + flee.speed <= 0
+            or can_catch(
+                (hunter[0] - step.stamina_use, *hunter[1:]),
+                runner,
+                lead - step.speed + flee.speed,
+            )
+            for step in options(*hunter)
+        )
+
+    with patched({"MAX_STAMINA": 90}):
+        for _ in range(150):
+            hunter = (rng.randint(1, 90), rng.choice([0, 1, 2]), rng.choice([0, 2]))
+            runner = (rng.randint(1, 90), rng.choice([0, 1, 2]), rng.choice([0, 2]))
+            lead = rng.randint(0, 60)
+            predator, prey = creature(*hunter), creature(*runner, lead)
+            assert caught(predator, prey, False, True, tmp_path) != can_escape(
+                hunter, runner, lead
+            )
+            predator, prey = creature(*hunter), creature(*runner, lead)
+            assert caught(predator, prey, True, False, tmp_path) == can_catch(
+                hunter, runner, lead
+            )
+
+
+def test_policy_never_does_worse_than_greedy(tmp_path):
+    rng = random.Random(2)
+    bodies = [(2, 0), (0, 2)]
+    for _ in range(300):
+        hunter = (rng.randint(50, 1500), *rng.choice(bodies))
+        runner = (rng.randint(50, 1500), *rng.choice(bodies))
+        lead = rng.randint(constants.MIN_POS, constants.MAX_POS)
+        outcomes = [
+            caught(creature(*hunter), creature(*runner, lead), *arms, tmp_path)
+            for arms in [(False, False), (False, True), (True, False)]
+        ]
+
+        assert outcomes[1] <= outcomes[0] <= outcomes[2]
+
+
+def test_policy_table_is_cached_on_disk(tmp_path):
+    info = MovementInfo(dict(constants.MOVE_INFO, crawl=(1, 1, 2, 0, 0)))
+    name = table_name(info, False, 31, 16)
+
+    built = policy_table(info, False, 31, 16, tmp_path)
+    del TABLES.entries[name]
+    loaded = policy_table(info, False, 31, 16, tmp_path)
+
+    assert [p.name for p in tmp_path.iterdir()] == [name + ".npy"]
+    assert loaded is not built and np.array_equal(loaded, built)
+    assert name != table_name(MovementInfo(constants.MOVE_INFO), False, 31, 16)
+
+
+def test_policy_checks_both_staminas():
+    from Assignment1.sweep import patched
+
+    info = MovementInfo(constants.MOVE_INFO)
+    with patched({"MAX_STAMINA": 40}):
+        predator, prey = creature(30, 2, 0), creature(41, 2, 0)
+        move = PolicyMove(info, predator, prey, True)
+        try:
+            move.move()
+        except ValueError:
+            prey.use_stamina(50)
+            assert move.move() is not None
+            return
+    assert False
+
+
+def test_policy_tables_are_bounded_in_memory():
+    from Assignment1.sweep import patched
+
+    info = MovementInfo(constants.MOVE_INFO)
+    for size in range(10, 15 + TABLES.capacity):
+        with patched({"MAX_STAMINA": size}):
+            policy_table(info, True, 1, 1)
+
+    assert len(TABLES.entries) == TABLES.capacity
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1 import constants
+from Assignment1.creature import CreatureInterface, FlatPredator, FlatPrey
+from Assignment1.movement_info import MovementInfo, Step
+
+IntArray = NDArray[np.int64]
+State = tuple[int, int, int, int]
+Body = tuple[int, int, int, int]
+
+REST = -1
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def state(predator: CreatureInterface, prey: CreatureInterface) -> State:
+    return (
+        predator.get_position(),
+        prey.get_position(),
+        predator.get_stamina(),
+        prey.get_stamina(),
+    )
+
+
+# Per tick the recorder only stores the steps the two moves returned, in
+# lists preallocated for as many ticks as the predator has stamina, so a
+# recorded tick costs two list stores and no creature reads. Positions and
+# stamina are rebuilt from the starting state when the recording is made, and
+# the final state read at the end of the chase lets replay check them. info
+# is the movement table the chase's moves use, the default one if not given.
+@dataclass
+class Recorder:
+    info: MovementInfo | None = field(default=None, repr=False)
+    predator_steps: list[Step | None] = field(default_factory=list, repr=False)
+    prey_steps: list[Step | None] = field(default_factory=list, repr=False)
+    size: int = 0
+    start_state: State = (0, 0, 0, 0)
+    end_state: State = (0, 0, 0, 0)
+    bodies: Body = (0, 0, 0, 0)
+
+    def start(self, predator: CreatureInterface, prey: CreatureInterface) -> None:
+        ticks = max(predator.get_stamina(), 0) + 1
+        self.predator_steps = [None] * ticks
+        self.prey_steps = [None] * ticks
+        self.size = 0
+        self.start_state = self.end_state = state(predator, prey)
+        self.bodies = (
+            predator.get_num_legs(),
+            predator.get_num_wings(),
+            prey.get_num_legs(),
+            prey.get_num_wings(),
+        )
+
+    def record(self, predator_step: Step | None, prey_step: Step | None) -> None:
+        i = self.size
+        if i == len(self.predator_steps):
+            self.predator_steps.extend([None] * i)
+            self.prey_steps.extend([None] * i)
+        self.predator_steps[i] = predator_step
+        self.prey_steps[i] = prey_step
+        self.size = i + 1
+
+    def finish(self, predator: CreatureInterface, prey: CreatureInterface) -> None:
+        self.end_state = state(predator, prey)
+
+    def recording(self) -> Recording:
+        return Recording.of(
+            self.start_state,
+            self.end_state,
+            self.bodies,
+            move_ids(self.predator_steps[: self.size]),
+            move_ids(self.prey_steps[: self.size]),
+            self.info,
+        )
+
+
+def move_ids(steps: list[Step | None]) -> IntArray:
+    order = constants.MOVEMENT_ORDER
+    return np.array(
+        [REST if step is None else order.index(step.movement) for step in steps],
+        dtype=np.int64,
+    ).reshape(-1)
+
+
+def move_table(info: MovementInfo) -> tuple[IntArray, IntArray]:
+    order = constants.MOVEMENT_ORDER
+    speed = [info.get_speed(m) for m in order] + [0]
+    use = [info.get_stamina_use(m) for m in order] + [0]
+    return np.array(speed, dtype=np.int64), np.array(use, dtype=np.int64)
+
+
+# path has one row per tick plus the starting row: predator position, prey
+# position, predator stamina, prey stamina.
+@dataclass
+class Recording:
+    path: IntArray
+    end_state: State
+    bodies: Body
+    predator_moves: IntArray
+    prey_moves: IntArray
+
+    @classmethod
+    def of(
+        cls,
+        start: State,
+        end: State,
+        bodies: Body,
+        predator_moves: IntArray,
+        prey_moves: IntArray,
+        info: MovementInfo | None = None,
+    ) -> Recording:
+        speed, use = move_table(info or MovementInfo(constants.MOVE_INFO))
+        steps = np.zeros((len(predator_moves) + 1, 4), dtype=np.int64)
+        steps[1:, 0], steps[1:, 1] = speed[predator_moves], speed[prey_moves]
+        steps[1:, 2], steps[1:, 3] = -use[predator_moves], -use[prey_moves]
+        steps[0] = start
+        return cls(np.cumsum(steps, axis=0), end, bodies, predator_moves, prey_moves)
+
+    @property
+    def ticks(self) -> int:
+        return len(self.path) - 1
+
+    def save(self, file: str) -> None:
+        np.savez_compressed(
+            file,
+            start=self.path[0],
+            end=np.array(self.end_state),
+            bodies=np.array(self.bodies),
+            predator_moves=self.predator_moves,
+            prey_moves=self.prey_moves,
+        )
+
+    @classmethod
+    def load(cls, file: str, info: MovementInfo | None = None) -> Recording:
+        with np.load(file) as data:
+            start, end, bodies = (
+                tuple(data[name].tolist()) for name in ("start", "end", "bodies")
+            )
+            return cls.of(
+                (start[0], start[1], start[2], start[3]),
+                (end[0], end[1], end[2], end[3]),
+                (bodies[0], bodies[1], bodies[2], bodies[3]),
+                data["predator_moves"],
+                data["prey_moves"],
+                info,
+            )
+
+
+# Replay rebuilds both creatures from the starting state and applies the
+# recorded moves tick by tick. Each move must be affordable for the creature's
+# body and stamina, and, when a greedy order is given, must be the greedy
+# choice. The chase must end where Chase would end it, in the final state the
+# recorder saw.
+def replay(
+    recording: Recording, info: MovementInfo, greedy_order: list[str] | None = None
+) -> str:
+    start, bodies = recording.path[0].tolist(), recording.bodies
+    predator = FlatPredator(start[0], start[2], *bodies[:2])
+    prey = FlatPrey(start[1], start[3], *bodies[2:])
+    sides = ((predator, recording.predator_moves), (prey, recording.prey_moves))
+
+    for tick in range(1, recording.ticks + 1):
+        if not predator.has_stamina():
+            raise ReplayError("tick " + str(tick) + ": predator had no stamina")
+        if tick > 1 and predator.get_position() >= prey.get_position():
+            raise ReplayError("tick " + str(tick) + ": prey was already caught")
+        for creature, moves in sides:
+            move = int(moves[tick - 1])
+            check_move(info, creature, move, greedy_order, tick)
+            if move != REST:
+                movement = constants.MOVEMENT_ORDER[move]
+                creature.use_stamina(info.get_stamina_use(movement))
+                creature.increment_position(info.get_speed(movement))
+
+    if state(predator, prey) != recording.end_state:
+        raise ReplayError("final state does not match the recorded run")
+    if recording.ticks and predator.get_position() >= prey.get_position():
+        return "caught"
+    if not predator.has_stamina():
+        return "escaped"
+    raise ReplayError("recording stops before the chase ended")
+
+
+def check_move(
+    info: MovementInfo,
+    creature: CreatureInterface,
+    move: int,
+    greedy_order: list[str] | None,
+    tick: int,
+) -> None:
+    movement = None if move == REST else constants.MOVEMENT_ORDER[move]
+    if movement is not None and not info.can_do_movement(creature, movement):
+        raise ReplayError("tick " + str(tick) + ": cannot " + movement)
+    if greedy_order is None:
+        return
+    step = info.get_ladder(
+        greedy_order, creature.get_num_legs(), creature.get_num_wings()
+    ).select(creature.get_stamina())
+    if (step.movement if step else None) != movement:
+        raise ReplayError("tick " + str(tick) + ": not the greedy move")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Replay and check a recorded chase")
+    parser.add_argument("recording", help=".npz file written by Recording.save")
+    parser.add_argument("--greedy", action="store_true", help="expect greedy moves")
+    args = parser.parse_args(argv)
+
+    info = MovementInfo(constants.MOVE_INFO)
+    recording = Recording.load(args.recording, info)
+    order = constants.MOVEMENT_ORDER if args.greedy else None
+    outcome = replay(recording, info, order)
+    print(str(recording.ticks) + " ticks replayed, prey " + outcome)
+
+
+def recorded(predator: FlatPredator, prey: FlatPrey, moves: list[str]) -> Recorder:
+    info, recorder = MovementInfo(constants.MOVE_INFO), Recorder()
+    recorder.start(predator, prey)
+    for movement in moves:
+        step = info.get_ladder([movement], 2, 2).select(10**6)
+        for creature in (predator, prey):
+            creature.use_stamina(info.get_stamina_use(movement))
+            creature.increment_position(info.get_speed(movement))
+        recorder.record(step, step)
+    recorder.finish(predator, prey)
+    return recorder
+
+
+def test_recorder_grows_past_preallocated_ticks():
+    recorder = recorded(FlatPredator(0, 2, 2, 0), FlatPrey(50, 9, 2, 0), ["crawl"] * 6)
+
+    assert recorder.recording().ticks == 6 and len(recorder.predator_steps) >= 6
+
+
+def test_recording_rebuilds_path():
+    recording = recorded(
+        FlatPredator(0, 100, 2, 0), FlatPrey(50, 100, 2, 0), ["walk", "hop", "crawl"]
+    ).recording()
+
+    order = constants.MOVEMENT_ORDER
+    assert recording.predator_moves.tolist() == [
+        order.index("walk"),
+        order.index("hop"),
+        order.index("crawl"),
+    ]
+    assert recording.path[:, 0].tolist() == [0, 4, 7, 8]
+    assert tuple(recording.path[-1].tolist()) == recording.end_state == (8, 58, 95, 95)
+
+
+def test_replay_rejects_infeasible_moves():
+    recording = recorded(
+        FlatPredator(0, 100, 0, 0), FlatPrey(500, 100, 0, 0), ["walk"]
+    ).recording()
+
+    try:
+        replay(recording, MovementInfo(constants.MOVE_INFO))
+    except ReplayError as error:
+        assert str(error) == "tick 1: cannot walk"
+        return
+    assert False
+
+
+def test_replay_rejects_non_greedy_moves(tmp_path):
+    info = MovementInfo(constants.MOVE_INFO)
+    recorder = recorded(FlatPredator(0, 1, 2, 0), FlatPrey(500, 100, 2, 0), ["crawl"])
+    recorder.recording().save(str(tmp_path / "chase.npz"))
+    loaded = Recording.load(str(tmp_path / "chase.npz"))
+
+    assert replay(loaded, info) == "escaped"
+    try:
+        replay(loaded, info, constants.MOVEMENT_ORDER)
+    except ReplayError as error:
+        assert str(error) == "tick 1: not the greedy move"
+        return
+    assert False
+
+
+def test_replay_rejects_unrecorded_movement():
+    recorder = recorded(FlatPredator(0, 1, 0, 0), FlatPrey(500, 100, 0, 0), ["crawl"])
+    recorder.end_state = (1, 502, 0, 99)
+
+    try:
+        replay(recorder.recording(), MovementInfo(constants.MOVE_INFO))
+    except ReplayError as error:
+        assert str(error) == "final state does not match the recorded run"
+        return
+    assert False
+
+
+if __name__ == "__main__":
+    main()
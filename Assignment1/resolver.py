@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from dataclasses import dataclass, field
+from random import Random
+from typing import Callable
+
+from Assignment1 import constants
+from Assignment1.characteristics import Legs, Position, Stamina, Wings
+from Assignment1.chase import Chase
+from Assignment1.creature import (
+    Creature,
+    CreatureInterface,
+    Predator,
+    Prey,
+    random_creature,
+)
+from Assignment1.fight import Fight
+from Assignment1.move import GreedyMove, RandomMove
+from Assignment1.movement_info import MovementInfo
+
+
+@dataclass
+class Phase:
+    ticks: int
+    speed: int
+    stamina_use: int
+
+
+@dataclass
+class Trajectory:
+    phases: list[Phase] = field(default_factory=list)
+
+    @classmethod
+    def greedy(cls, move: GreedyMove) -> Trajectory:
+        stamina = move.creature.get_stamina()
+        phases = []
+        for step in move.ladder.steps:
+            if stamina >= step.required_stamina:
+                ticks = (stamina - step.required_stamina) // step.stamina_use + 1
+                phases.append(Phase(ticks, step.speed, step.stamina_use))
+                stamina -= ticks * step.stamina_use
+        return cls(phases)
+
+    def duration(self) -> int:
+        return sum(phase.ticks for phase in self.phases)
+
+    def boundaries(self) -> list[int]:
+        ends, tick = [], 0
+        for phase in self.phases:
+            tick += phase.ticks
+            ends.append(tick)
+        return ends
+
+    def distance(self, tick: int) -> int:
+        return self.accumulate(tick, lambda phase: phase.speed)
+
+    def stamina_used(self, tick: int) -> int:
+        return self.accumulate(tick, lambda phase: phase.stamina_use)
+
+    def accumulate(self, tick: int, per_tick: Callable[[Phase], int]) -> int:
+        total, start = 0, 0
+        for phase in self.phases:
+            total += per_tick(phase) * min(phase.ticks, max(0, tick - start))
+            start += phase.ticks
+        return total
+
+    def speed_at(self, tick: int) -> int:
+        start = 0
+        for phase in self.phases:
+            start += phase.ticks
+            if tick <= start:
+                return phase.speed
+        return 0
+
+    def apply(self, creature: CreatureInterface, tick: int) -> None:
+        creature.use_stamina(self.stamina_used(tick))
+        creature.increment_position(self.distance(tick))
+
+
+@dataclass
+class ChaseResult:
+    caught: bool
+    ticks: int
+
+
+def resolve_chase(hunter: Trajectory, runner: Trajectory, gap: int) -> ChaseResult:
+    end = hunter.duration()
+    stops = {b for b in hunter.boundaries() + runner.boundaries() if b < end}
+    start = 0
+    for stop in sorted(stops | {end}):
+        closing = hunter.speed_at(start + 1) - runner.speed_at(start + 1)
+        remaining = gap - hunter.distance(start) + runner.distance(start)
+        if closing > 0:
+            ticks = max(1, -(-remaining // closing))
+        else:
+            ticks = 1 if remaining <= closing else stop + 1
+        if start + ticks <= stop:
+            return ChaseResult(True, start + ticks)
+        start = stop
+    return ChaseResult(False, end)
+
+
+@dataclass
+class ClosedFormChase(Chase):
+    def chase(self) -> str:
+        if (
+            self.recorder is not None
+            or not isinstance(self.predator_move, GreedyMove)
+            or not isinstance(self.prey_move, GreedyMove)
+        ):
+            return super().chase()
+
+        hunter = Trajectory.greedy(self.predator_move)
+        runner = Trajectory.greedy(self.prey_move)
+        result = resolve_chase(
+            hunter, runner, self.prey.get_position() - self.predator.get_position()
+        )
+        hunter.apply(self.predator_move.creature, result.ticks)
+        runner.apply(self.prey_move.creature, result.ticks)
+        return self.engage() if result.caught else self.escape()
+
+    def new_fight(self) -> Fight:
+        return Fight(self.prey, self.predator, instant=True, sink=self.sink)
+
+
+def greedy_pair(predator: Creature, prey: Creature) -> tuple[GreedyMove, GreedyMove]:
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+    return GreedyMove(info, predator, order), GreedyMove(info, prey, order)
+
+
+def random_pair(rng: Random) -> tuple[Predator, Prey]:
+    predator = random_creature(Predator, rng, 0)
+    prey = random_creature(Prey, rng, rng.randint(constants.MIN_POS, 250))
+    return predator, prey
+
+
+def test_closed_form_matches_chase():
+    rng = Random(11)
+    for _ in range(200):
+        predator, prey = random_pair(rng)
+        expected_predator, expected_prey = deepcopy(predator), deepcopy(prey)
+
+        message = ClosedFormChase(predator, prey, *greedy_pair(predator, prey)).chase()
+        expected = Chase(
+            expected_predator,
+            expected_prey,
+            *greedy_pair(expected_predator, expected_prey),
+        ).chase()
+
+        assert message == expected
+        assert predator == expected_predator and prey == expected_prey
+
+
+def test_closed_form_catch_tick():
+    predator = Predator(Position(0), Stamina(25), Legs(2), Wings(2))
+    prey = Prey(Position(5), Stamina(15), Legs(1), Wings(0))
+    hunter, runner = greedy_pair(predator, prey)
+
+    result = resolve_chase(Trajectory.greedy(hunter), Trajectory.greedy(runner), 5)
+
+    assert result == ChaseResult(True, 3)
+
+
+def test_closed_form_escape():
+    predator = Predator(Position(0), Stamina(15), Legs(1), Wings(1))
+    prey = Prey(Position(3), Stamina(25), Legs(1), Wings(2))
+    chase = ClosedFormChase(predator, prey, *greedy_pair(predator, prey))
+
+    assert chase.chase() == constants.PREY_WIN_MESSAGE
+    assert not predator.has_stamina() and not chase.predator_caught_prey()
+
+
+def test_greedy_trajectory_phases():
+    creature = Creature(Position(0), Stamina(85), Legs(2), Wings(2))
+    hunter, _ = greedy_pair(creature, creature)
+
+    assert Trajectory.greedy(hunter).phases == [
+        Phase(2, 8, 4),
+        Phase(5, 6, 4),
+        Phase(9, 4, 2),
+        Phase(10, 3, 2),
+        Phase(19, 1, 1),
+    ]
+
+
+def test_closed_form_exhausted_predator_never_catches():
+    predator = Predator(Position(0), Stamina(0), Legs(0), Wings(0))
+    prey = Prey(Position(0), Stamina(0), Legs(0), Wings(0))
+    hunter, runner = greedy_pair(predator, prey)
+
+    result = resolve_chase(Trajectory.greedy(hunter), Trajectory.greedy(runner), 0)
+
+    assert result == ChaseResult(False, 0)
+
+
+def test_closed_form_falls_back_for_random_moves():
+    predator = Predator(Position(0), Stamina(30), Legs(2), Wings(0))
+    prey = Prey(Position(2), Stamina(5), Legs(0), Wings(0))
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+
+    message = ClosedFormChase(
+        predator, prey, RandomMove(info, predator, order), RandomMove(info, prey, order)
+    ).chase()
+
+    assert message in (constants.PREDATOR_WIN_MESSAGE, constants.PREY_WIN_MESSAGE)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import random
+from collections import deque
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Generator
+
+from Assignment1 import constants
+from Assignment1.chase import Chase
+from Assignment1.creature import Predator, Prey, random_creature
+from Assignment1.events import NullSink
+from Assignment1.move import GreedyMove
+from Assignment1.movement_info import MovementInfo
+
+CLOCK_INTERVAL = 1024
+
+
+# Chases advance round-robin, one tick per turn, and leave the queue as soon
+# as they finish. A call to run() stops after max_ticks turns or max_seconds
+# of wall time; the clock is only read every CLOCK_INTERVAL turns.
+@dataclass
+class Scheduler:
+    active: deque[tuple[int, Generator[int, None, str]]] = field(default_factory=deque)
+    results: dict[int, str] = field(default_factory=dict)
+    submitted: int = 0
+    ticks: int = 0
+
+    def submit(self, chase: Chase) -> int:
+        key = self.submitted
+        self.active.append((key, chase.steps()))
+        self.submitted += 1
+        return key
+
+    def pending(self) -> int:
+        return len(self.active)
+
+    def done(self) -> bool:
+        return not self.active
+
+    def run(
+        self, max_ticks: int | None = None, max_seconds: float | None = None
+    ) -> dict[int, str]:
+        active, finished = self.active, {}
+        deadline = None if max_seconds is None else perf_counter() + max_seconds
+        turns = 0
+        while active and (max_ticks is None or turns < max_ticks):
+            if deadline is not None and turns % CLOCK_INTERVAL == 0:
+                if perf_counter() >= deadline:
+                    break
+            key, steps = active.popleft()
+            turns += 1
+            try:
+                next(steps)
+            except StopIteration as stop:
+                finished[key] = stop.value
+                continue
+            active.append((key, steps))
+
+        self.ticks += turns
+        self.results.update(finished)
+        return finished
+
+
+def greedy_chases(count: int, seed: int) -> list[Chase]:
+    rng, sink = random.Random(seed), NullSink()
+    info = MovementInfo(constants.MOVE_INFO)
+    order = constants.MOVEMENT_ORDER
+    chases = []
+    for _ in range(count):
+        predator = random_creature(Predator, rng, 0)
+        prey = random_creature(Prey, rng, rng.randint(0, 200))
+        chases.append(
+            Chase(
+                predator,
+                prey,
+                GreedyMove(info, predator, order),
+                GreedyMove(info, prey, order),
+                sink,
+            )
+        )
+    return chases
+
+
+def test_scheduler_matches_chase():
+    scheduler = Scheduler()
+    for chase in greedy_chases(300, 3):
+        scheduler.submit(chase)
+
+    scheduler.run()
+
+    expected = [chase.chase() for chase in greedy_chases(300, 3)]
+    assert scheduler.done()
+    assert [scheduler.results[key] for key in range(300)] == expected
+
+
+def test_scheduler_resumes_after_tick_cap():
+    scheduler = Scheduler()
+    for chase in greedy_chases(50, 4):
+        scheduler.submit(chase)
+
+    first = scheduler.run(max_ticks=100)
+    assert scheduler.ticks == 100 and scheduler.pending() + len(first) == 50
+
+    rest = scheduler.run()
+    assert scheduler.done() and len(first) + len(rest) == 50
+
+
+def test_scheduler_retires_finished_chases():
+    scheduler = Scheduler()
+    for chase in greedy_chases(20, 5):
+        scheduler.submit(chase)
+    pending = []
+
+    while not scheduler.done():
+        scheduler.run(max_ticks=scheduler.pending())
+        pending.append(scheduler.pending())
+
+    assert pending == sorted(pending, reverse=True) and pending[-1] == 0
+
+
+def test_scheduler_stops_at_wall_time():
+    scheduler = Scheduler()
+    for chase in greedy_chases(20, 6):
+        scheduler.submit(chase)
+
+    assert scheduler.run(max_seconds=0) == {} and scheduler.pending() == 20
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import pickle
+import socket
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from Assignment1.atomic import atomic_write
+from Assignment1.campaign import Campaign, run_chunk
+from Assignment1.stats import OutcomeAggregator
+
+PLAN = "plan.json"
+
+
+class ShardError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ShardPlan:
+    matchups: int
+    seed: int = 0
+    chunk_size: int = 10_000
+    shards: int = 1
+
+    def campaign(self) -> Campaign:
+        return Campaign(self.matchups, self.seed, chunk_size=self.chunk_size)
+
+    def chunks(self, index: int) -> range:
+        count = len(self.campaign().chunk_sizes())
+        return range(count * index // self.shards, count * (index + 1) // self.shards)
+
+    def write(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / PLAN).write_text(json.dumps(asdict(self)))
+
+    @classmethod
+    def load(cls, directory: Path) -> ShardPlan:
+        return cls(**json.loads((directory / PLAN).read_text()))
+
+
+def run_id() -> str:
+    return socket.gethostname() + "-" + str(os.getpid())
+
+
+def claim(directory: Path, index: int) -> bool:
+    try:
+        os.close(
+            os.open(directory / ("shard-%04d.claim" % index), os.O_CREAT | os.O_EXCL)
+        )
+    except FileExistsError:
+        return False
+    return True
+
+
+def run_shard(directory: Path, index: int) -> Path:
+    plan = ShardPlan.load(directory)
+    campaign = plan.campaign()
+    seeds, sizes = campaign.chunk_seeds(), campaign.chunk_sizes()
+    result = OutcomeAggregator()
+    for chunk in plan.chunks(index):
+        result.merge(run_chunk(seeds[chunk], sizes[chunk]))
+
+    path = directory / ("shard-%04d.%s.result" % (index, run_id()))
+    with atomic_write(path) as file:
+        pickle.dump((plan, index, result), file)
+    return path
+
+
+# Workers sharing a directory claim shards with exclusive file creation, so
+# each shard normally runs once. Every result file carries the run that wrote
+# it, which lets merge() notice shards that were computed twice anyway.
+def work(directory: Path) -> list[int]:
+    done = []
+    for index in range(ShardPlan.load(directory).shards):
+        if claim(directory, index):
+            run_shard(directory, index)
+            done.append(index)
+    return done
+
+
+def merge(directory: Path) -> OutcomeAggregator:
+    plan = ShardPlan.load(directory)
+    found: dict[int, list[OutcomeAggregator]] = {}
+    for path in sorted(directory.glob("shard-*.result")):
+        with open(path, "rb") as file:
+            shard_plan, index, result = pickle.load(file)
+        if shard_plan != plan or not 0 <= index < plan.shards:
+            raise ShardError(path.name + " does not belong to this plan")
+        found.setdefault(index, []).append(result)
+
+    missing = [i for i in range(plan.shards) if i not in found]
+    repeated = [i for i, results in found.items() if len(results) > 1]
+    if missing:
+        raise ShardError("missing shards: " + ", ".join(map(str, missing)))
+    if repeated:
+        raise ShardError("shards completed twice: " + ", ".join(map(str, repeated)))
+
+    total = OutcomeAggregator()
+    for index in range(plan.shards):
+        total.merge(found[index][0])
+    return total
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Run a campaign as shards in a directory")
+    parser.add_argument("command", choices=["plan", "run", "merge"])
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--matchups", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--shards", type=int, default=10)
+    parser.add_argument("--shard", type=int, help="run only this shard")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        ShardPlan(args.matchups, args.seed, args.chunk_size, args.shards).write(
+            args.directory
+        )
+    elif args.command == "run" and args.shard is not None:
+        run_shard(args.directory, args.shard)
+    elif args.command == "run":
+        work(args.directory)
+    else:
+        print(merge(args.directory).summary())
+
+
+def test_sharded_campaign_matches_campaign(tmp_path):
+    plan = ShardPlan(5_500, seed=6, chunk_size=500, shards=4)
+    plan.write(tmp_path)
+
+    with ProcessPoolExecutor(3) as pool:
+        done = sum(pool.map(work, [tmp_path] * 3), [])
+
+    merged, expected = merge(tmp_path), plan.campaign().run()
+    assert sorted(done) == [0, 1, 2, 3]
+    assert merged.breakdowns == expected.breakdowns
+    assert merged.catch_distance == expected.catch_distance
+    assert (merged.matchups, merged.predator_wins) == (5_500, expected.predator_wins)
+    assert math.isclose(merged.chase_lengths.mean, expected.chase_lengths.mean)
+
+
+def test_shards_cover_every_chunk_once():
+    plan = ShardPlan(10_500, chunk_size=1_000, shards=4)
+
+    chunks = [chunk for index in range(4) for chunk in plan.chunks(index)]
+
+    assert chunks == list(range(11))
+
+
+def test_merge_rejects_missing_and_repeated_shards(tmp_path):
+    ShardPlan(2_000, seed=1, chunk_size=500, shards=2).write(tmp_path)
+    path = run_shard(tmp_path, 0)
+
+    for expected in ("missing shards: 1", "shards completed twice: 0"):
+        try:
+            merge(tmp_path)
+        except ShardError as error:
+            assert str(error) == expected
+        else:
+            assert False
+        run_shard(tmp_path, 1)
+        (tmp_path / path.name.replace(".result", "-again.result")).write_bytes(
+            path.read_bytes()
+        )
+
+
+def test_merge_rejects_results_from_another_plan(tmp_path):
+    ShardPlan(1_000, seed=1, chunk_size=500, shards=1).write(tmp_path)
+    run_shard(tmp_path, 0)
+    ShardPlan(1_000, seed=2, chunk_size=500, shards=1).write(tmp_path)
+
+    try:
+        merge(tmp_path)
+    except ShardError:
+        return
+    assert False
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,97 @@
+from __future__ import annotations
+
+import random
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
 from Assignment1 import constants
+from Assignment1.campaign import Campaign
+from Assignment1.characteristics import RandomSource
 from Assignment1.chase import Chase
 from Assignment1.creature import Predator, Prey
+from Assignment1.events import CONSOLE, EventSink, FileSink, NullSink
 from Assignment1.move import GreedyMove
 from Assignment1.movement_info import MovementInfo
 
-if __name__ == "__main__":
+
+def simulate(rng: RandomSource = random, sink: EventSink = CONSOLE) -> None:
     for i in range(0, constants.NUM_SIMULATIONS):
-        predator = Predator()
-        predator.evolve()
+        predator = Predator(sink=sink)
+        predator.evolve(rng)
 
-        prey = Prey()
-        prey.evolve()
+        prey = Prey(sink=sink)
+        prey.evolve(rng=rng)
 
         info = MovementInfo(constants.MOVE_INFO)
         order = constants.MOVEMENT_ORDER
         predator_move = GreedyMove(info, predator, order)
         prey_move = GreedyMove(info, prey, order)
 
-        Chase(predator, prey, predator_move, prey_move).chase()
-        print()
+        Chase(predator, prey, predator_move, prey_move, sink).chase()
+        if sink is CONSOLE:
+            print()
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser(description="Predator and prey simulation")
+    parser.add_argument("--matchups", type=int, help="run a campaign of this size")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--target-width",
+        type=float,
+        help="stop the campaign once the 95%% CI on the win rate is this narrow",
+    )
+    parser.add_argument(
+        "--checkpoint", type=Path, help="save campaign progress to this file"
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=5.0,
+        help="seconds between checkpoint writes",
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="continue from the checkpoint file"
+    )
+    parser.add_argument("--quiet", action="store_true", help="discard all events")
+    parser.add_argument("--events", help="write events as JSON lines to this file")
+    args = parser.parse_args(argv)
+    if args.resume and args.checkpoint is None:
+        parser.error("--resume needs --checkpoint")
+    return args
+
+
+def event_sink(args: Namespace) -> EventSink:
+    if args.events:
+        return FileSink(open(args.events, "w"), records_moves=True)
+    if args.quiet:
+        return NullSink()
+    return CONSOLE
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.matchups is None:
+        sink = event_sink(args)
+        simulate(random if args.seed is None else random.Random(args.seed), sink)
+        if isinstance(sink, FileSink):
+            sink.close()
+        return
+
+    seed = 0 if args.seed is None else args.seed
+    campaign = Campaign(
+        args.matchups,
+        seed,
+        args.workers,
+        args.chunk_size,
+        args.target_width,
+        args.checkpoint,
+        args.checkpoint_interval,
+    )
+    print(campaign.run(args.resume).summary())
+
+
+if __name__ == "__main__":
+    main()
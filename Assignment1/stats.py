@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1.batch import BatchOutcome, CreatureBatch
+
+TRAITS = ("legs", "wings", "claws")
+
+
+@dataclass
+class RunningStats:
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def add_all(self, values: NDArray[np.int64]) -> None:
+        self.merge(RunningStats.of(values))
+
+    @classmethod
+    def of(cls, values: NDArray[np.int64]) -> RunningStats:
+        if not len(values):
+            return cls()
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        return cls(len(values), mean, m2, float(values.min()), float(values.max()))
+
+    def merge(self, other: RunningStats) -> None:
+        count = self.count + other.count
+        if not other.count:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+
+def wilson_interval(
+    successes: int, trials: int, z: float = 1.96
+) -> tuple[float, float]:
+    if not trials:
+        return 0.0, 1.0
+    rate = successes / trials
+    scale = 1 + z * z / trials
+    centre = rate + z * z / (2 * trials)
+    spread = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials**2))
+    return max(0.0, (centre - spread) / scale), min(1.0, (centre + spread) / scale)
+
+
+@dataclass
+class Tally:
+    matchups: int = 0
+    predator_wins: int = 0
+
+    def merge(self, other: Tally) -> None:
+        self.matchups += other.matchups
+        self.predator_wins += other.predator_wins
+
+    def win_rate(self) -> float:
+        return self.predator_wins / self.matchups if self.matchups else 0.0
+
+
+def merge_counts(counts: dict[int, int], other: dict[int, int]) -> None:
+    for key, count in other.items():
+        counts[key] = counts.get(key, 0) + count
+
+
+@dataclass
+class Histogram:
+    width: int = 50
+    counts: dict[int, int] = field(default_factory=dict)
+
+    def add(self, value: int) -> None:
+        merge_counts(self.counts, {value // self.width: 1})
+
+    def add_all(self, values: NDArray[np.int64]) -> None:
+        bins, counts = np.unique(values // self.width, return_counts=True)
+        merge_counts(self.counts, dict(zip(bins.tolist(), counts.tolist())))
+
+    def merge(self, other: Histogram) -> None:
+        merge_counts(self.counts, other.counts)
+
+    def bins(self) -> list[tuple[int, int]]:
+        return [(b * self.width, self.counts[b]) for b in sorted(self.counts)]
+
+
+@dataclass
+class Breakdown:
+    tallies: dict[int, Tally] = field(default_factory=dict)
+
+    def tally(self, value: int) -> Tally:
+        return self.tallies.setdefault(value, Tally())
+
+    def add(self, value: int, predator_won: bool) -> None:
+        self.tally(value).merge(Tally(1, int(predator_won)))
+
+    def add_all(
+        self, values: NDArray[np.int64], predator_won: NDArray[np.bool_]
+    ) -> None:
+        matchups = np.bincount(values)
+        wins = np.bincount(values, weights=predator_won)
+        for value in np.flatnonzero(matchups).tolist():
+            self.tally(value).merge(Tally(int(matchups[value]), int(wins[value])))
+
+    def merge(self, other: Breakdown) -> None:
+        for value, tally in other.tallies.items():
+            self.tally(value).merge(tally)
+
+
+@dataclass
+class OutcomeAggregator:
+    matchups: int = 0
+    predator_wins: int = 0
+    escapes: int = 0
+    chase_lengths: RunningStats = field(default_factory=RunningStats)
+    catch_distance: Histogram = field(default_factory=Histogram)
+    breakdowns: dict[str, Breakdown] = field(default_factory=dict)
+
+    def breakdown(self, side: str, trait: str) -> Breakdown:
+        return self.breakdowns.setdefault(side + "_" + trait, Breakdown())
+
+    def add(
+        self,
+        caught: bool,
+        ticks: int,
+        predator_won: bool,
+        distance: int,
+        predator_traits: dict[str, int],
+        prey_traits: dict[str, int],
+    ) -> None:
+        self.matchups += 1
+        self.predator_wins += int(predator_won)
+        self.escapes += int(not caught)
+        self.chase_lengths.add(ticks)
+        if caught:
+            self.catch_distance.add(distance)
+        for side, traits in (("predator", predator_traits), ("prey", prey_traits)):
+            for trait in TRAITS:
+                self.breakdown(side, trait).add(traits[trait], predator_won)
+
+    def add_batch(
+        self, outcome: BatchOutcome, predators: CreatureBatch, prey: CreatureBatch
+    ) -> None:
+        self.merge(OutcomeAggregator.of(outcome, predators, prey))
+
+    @classmethod
+    def of(
+        cls, outcome: BatchOutcome, predators: CreatureBatch, prey: CreatureBatch
+    ) -> OutcomeAggregator:
+        aggregator = cls(
+            len(outcome),
+            int(np.count_nonzero(outcome.predator_won)),
+            int(np.count_nonzero(~outcome.caught)),
+            RunningStats.of(outcome.ticks),
+        )
+        aggregator.catch_distance.add_all(outcome.distance[outcome.caught])
+        for side, batch in (("predator", predators), ("prey", prey)):
+            for trait in TRAITS:
+                aggregator.breakdown(side, trait).add_all(
+                    getattr(batch, trait), outcome.predator_won
+                )
+        return aggregator
+
+    def merge(self, other: OutcomeAggregator) -> None:
+        self.matchups += other.matchups
+        self.predator_wins += other.predator_wins
+        self.escapes += other.escapes
+        self.chase_lengths.merge(other.chase_lengths)
+        self.catch_distance.merge(other.catch_distance)
+        for name, breakdown in other.breakdowns.items():
+            self.breakdowns.setdefault(name, Breakdown()).merge(breakdown)
+
+    def prey_fight_wins(self) -> int:
+        return self.matchups - self.predator_wins - self.escapes
+
+    def predator_win_rate(self) -> float:
+        return self.predator_wins / self.matchups if self.matchups else 0.0
+
+    def win_rate_interval(self, z: float = 1.96) -> tuple[float, float]:
+        return wilson_interval(self.predator_wins, self.matchups, z)
+
+    def summary(self) -> str:
+        lengths = self.chase_lengths
+        lines = [
+            "Matchups: " + str(self.matchups),
+            "Predator wins: " + str(self.predator_wins),
+            "Prey escapes: " + str(self.escapes),
+            "Prey fight wins: " + str(self.prey_fight_wins()),
+            "Predator win rate: " + format(self.predator_win_rate(), ".4f"),
+            "Predator win rate 95% CI: "
+            + " - ".join(format(bound, ".4f") for bound in self.win_rate_interval()),
+            "Chase length: "
+            + format(lengths.mean, ".2f")
+            + " +/- "
+            + format(lengths.std(), ".2f"),
+        ]
+        for name in sorted(self.breakdowns):
+            tallies = self.breakdowns[name].tallies
+            lines.append(
+                "Win rate by "
+                + name
+                + ": "
+                + ", ".join(
+                    str(value) + "=" + format(tallies[value].win_rate(), ".3f")
+                    for value in sorted(tallies)
+                )
+            )
+        return "\n".join(lines)
+
+
+def test_running_stats_add():
+    stats = RunningStats()
+    for value in [2, 4, 4, 4, 5, 5, 7, 9]:
+        stats.add(value)
+
+    assert stats.mean == 5 and math.isclose(stats.variance(), 32 / 7)
+    assert (stats.minimum, stats.maximum) == (2, 9)
+
+
+def test_running_stats_merge_matches_single_pass():
+    values = np.random.default_rng(1).integers(0, 1500, size=1000)
+    merged = RunningStats()
+    for part in np.array_split(values, 7):
+        merged.merge(RunningStats.of(part))
+
+    assert merged.count == len(values)
+    assert math.isclose(merged.mean, values.mean())
+    assert math.isclose(merged.variance(), values.var(ddof=1))
+    assert merged.maximum == values.max()
+
+
+def test_running_stats_merge_empty():
+    stats = RunningStats.of(np.array([3, 5]))
+
+    stats.merge(RunningStats())
+    RunningStats().merge(stats)
+
+    assert stats.count == 2 and stats.mean == 4
+
+
+def test_wilson_interval():
+    low, high = wilson_interval(30, 100)
+
+    assert math.isclose(low, 0.2189, abs_tol=1e-4)
+    assert math.isclose(high, 0.3958, abs_tol=1e-4)
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    assert wilson_interval(0, 10)[0] == 0.0
+
+
+def test_histogram_bins():
+    histogram = Histogram(10)
+
+    histogram.add_all(np.array([1, 9, 10, 35]))
+    histogram.add(12)
+
+    assert histogram.bins() == [(0, 2), (10, 2), (30, 1)]
+
+
+def test_aggregator_batch_matches_streaming():
+    outcome = BatchOutcome(
+        np.array([True, False, True]),
+        np.array([4, 15, 7]),
+        np.array([True, False, False]),
+        np.array([20, 15, 31]),
+    )
+    predators = CreatureBatch(*(np.array([0, 2, 2]) for _ in range(8)))
+    prey = CreatureBatch(*(np.array([1, 1, 3]) for _ in range(8)))
+    streamed = OutcomeAggregator()
+    for i in range(3):
+        streamed.add(
+            bool(outcome.caught[i]),
+            int(outcome.ticks[i]),
+            bool(outcome.predator_won[i]),
+            int(outcome.distance[i]),
+            {trait: int(getattr(predators, trait)[i]) for trait in TRAITS},
+            {trait: int(getattr(prey, trait)[i]) for trait in TRAITS},
+        )
+
+    batched = OutcomeAggregator.of(outcome, predators, prey)
+
+    assert batched.breakdowns == streamed.breakdowns
+    assert batched.catch_distance == streamed.catch_distance
+    assert math.isclose(batched.chase_lengths.mean, streamed.chase_lengths.mean)
+    assert batched.breakdown("predator", "legs").tallies == {
+        0: Tally(1, 1),
+        2: Tally(2, 0),
+    }
+    assert batched.catch_distance.bins() == [(0, 2)]
+
+
+def test_aggregator_merge_is_order_independent():
+    first, second = OutcomeAggregator(), OutcomeAggregator()
+    first.add(
+        True,
+        5,
+        True,
+        30,
+        dict(legs=2, wings=0, claws=1),
+        dict(legs=1, wings=0, claws=3),
+    )
+    second.add(
+        False,
+        9,
+        False,
+        9,
+        dict(legs=4, wings=2, claws=2),
+        dict(legs=0, wings=4, claws=1),
+    )
+
+    left, right = OutcomeAggregator(), OutcomeAggregator()
+    left.merge(first)
+    left.merge(second)
+    right.merge(second)
+    right.merge(first)
+
+    assert left.matchups == right.matchups == 2
+    assert left.breakdowns == right.breakdowns
+    assert left.catch_distance == right.catch_distance
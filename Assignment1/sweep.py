@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import random
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import product
+from pathlib import Path
+from typing import Any, Iterator
+
+from Assignment1 import constants
+from Assignment1.atomic import atomic_write
+from Assignment1.campaign import Campaign
+from Assignment1.creature import FlatPrey
+from Assignment1.events import NullSink
+from Assignment1.stats import OutcomeAggregator
+
+Overrides = dict[str, Any]
+
+
+@contextmanager
+def patched(overrides: Overrides) -> Iterator[None]:
+    unknown = [name for name in overrides if not hasattr(constants, name)]
+    if unknown:
+        raise KeyError("unknown constants: " + ", ".join(sorted(unknown)))
+    saved = {name: getattr(constants, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(constants, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(constants, name, value)
+
+
+def used_constants() -> dict[str, Any]:
+    return {name: getattr(constants, name) for name in dir(constants) if name.isupper()}
+
+
+# JSON turns the int keys of tables such as CLAWS_POWER_MULTIPLIER into
+# strings and tuples into lists, so values are rebuilt in the shape of the
+# constant they replace and rejected if they do not match it.
+def decode(value: Any, like: Any) -> Any:
+    if isinstance(like, dict) and isinstance(value, dict) and like:
+        key, item = next(iter(like.items()))
+        return {type(key)(k): decode(v, item) for k, v in value.items()}
+    if isinstance(like, tuple) and isinstance(value, list) and len(value) == len(like):
+        return tuple(decode(v, w) for v, w in zip(value, like))
+    if not isinstance(value, type(like)):
+        raise TypeError("expected " + type(like).__name__ + ", got " + repr(value))
+    return value
+
+
+def decode_axes(axes: dict[str, list[Any]]) -> dict[str, list[Any]]:
+    unknown = [name for name in axes if not hasattr(constants, name)]
+    if unknown:
+        raise KeyError("unknown constants: " + ", ".join(sorted(unknown)))
+    return {
+        name: [decode(value, getattr(constants, name)) for value in values]
+        for name, values in axes.items()
+    }
+
+
+def grid(axes: dict[str, list[Any]]) -> list[Overrides]:
+    names = sorted(axes)
+    return [dict(zip(names, values)) for values in product(*(axes[n] for n in names))]
+
+
+def sample(axes: dict[str, list[Any]], count: int, seed: int = 0) -> list[Overrides]:
+    rng = random.Random(seed)
+    names = sorted(axes)
+    return [{name: rng.choice(axes[name]) for name in names} for _ in range(count)]
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    overrides: Overrides
+    matchups: int
+    seed: int = 0
+    chunk_size: int = 10_000
+
+    def key(self) -> str:
+        with patched(self.overrides):
+            used = used_constants()
+        text = json.dumps(
+            [sorted(used.items()), self.matchups, self.seed, self.chunk_size],
+            sort_keys=True,
+        )
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+def run_point(point: SweepPoint) -> OutcomeAggregator:
+    with patched(point.overrides):
+        return Campaign(point.matchups, point.seed, 1, point.chunk_size).run()
+
+
+@dataclass
+class ResultCache:
+    directory: Path
+
+    def path(self, key: str) -> Path:
+        return self.directory / (key + ".pickle")
+
+    def get(self, key: str) -> OutcomeAggregator | None:
+        try:
+            with open(self.path(key), "rb") as file:
+                result: OutcomeAggregator = pickle.load(file)
+                return result
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, result: OutcomeAggregator) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with atomic_write(self.path(key)) as file:
+            pickle.dump(result, file)
+
+
+@dataclass
+class Sweep:
+    points: list[Overrides]
+    matchups: int
+    seed: int = 0
+    workers: int = 1
+    chunk_size: int = 10_000
+    cache: ResultCache | None = None
+    computed: int = field(default=0, init=False)
+
+    def sweep_points(self) -> list[SweepPoint]:
+        return [
+            SweepPoint(overrides, self.matchups, self.seed, self.chunk_size)
+            for overrides in self.points
+        ]
+
+    def compute(self, points: list[SweepPoint]) -> Iterator[OutcomeAggregator]:
+        if self.workers == 1:
+            yield from map(run_point, points)
+            return
+        with ProcessPoolExecutor(self.workers) as pool:
+            yield from pool.map(run_point, points)
+
+    def run(self) -> list[tuple[Overrides, OutcomeAggregator]]:
+        points = self.sweep_points()
+        keys = [point.key() for point in points]
+        results: dict[str, OutcomeAggregator] = {}
+        for key in keys:
+            cached = self.cache.get(key) if self.cache else None
+            if cached is not None:
+                results[key] = cached
+
+        pending = {k: p for k, p in zip(keys, points) if k not in results}
+        for key, result in zip(pending, self.compute(list(pending.values()))):
+            results[key] = result
+            self.computed += 1
+            if self.cache:
+                self.cache.put(key, result)
+        return [(point.overrides, results[key]) for point, key in zip(points, keys)]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Sweep campaigns over constant overrides")
+    parser.add_argument("axes", help="JSON object of constant name to value list")
+    parser.add_argument("--samples", type=int, help="sample points instead of grid")
+    parser.add_argument("--matchups", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--cache", help="directory for cached point results")
+    args = parser.parse_args(argv)
+
+    try:
+        axes = decode_axes(json.loads(args.axes))
+    except (KeyError, TypeError, ValueError) as error:
+        parser.error(str(error))
+    points = (
+        grid(axes) if args.samples is None else sample(axes, args.samples, args.seed)
+    )
+    cache = ResultCache(Path(args.cache)) if args.cache else None
+    sweep = Sweep(
+        points, args.matchups, args.seed, args.workers, args.chunk_size, cache
+    )
+    for overrides, result in sweep.run():
+        print(json.dumps(overrides) + ": " + format(result.predator_win_rate(), ".4f"))
+
+
+def test_patched_restores_constants():
+    with patched({"MAX_HEALTH": 60}):
+        assert constants.MAX_HEALTH == 60
+
+    assert constants.MAX_HEALTH == 100
+
+
+def test_patched_rejects_unknown_constants():
+    try:
+        with patched({"MAX_TAILS": 3}):
+            pass
+    except KeyError:
+        return
+    assert False
+
+
+def test_patched_reaches_defaults():
+    with patched({"DEFAULT_POWER": 1, "MAX_POS": 10}):
+        prey = FlatPrey(sink=NullSink())
+        power = prey.get_attack_power()
+        prey.evolve(rng=random.Random(3))
+
+    assert prey.get_position() <= 10
+    assert power == (
+        constants.CLAWS_POWER_MULTIPLIER[constants.DEFAULT_CLAW_LEVEL]
+        + constants.TEETH_POWER_BOOST[constants.DEFAULT_TEETH_SHARPNESS]
+    )
+
+
+def test_grid_and_sample():
+    axes = {"MAX_HEALTH": [60, 100], "MAX_CLAW": [1, 2, 3]}
+
+    assert len(grid(axes)) == 6
+    assert {"MAX_CLAW": 3, "MAX_HEALTH": 60} in grid(axes)
+    assert sample(axes, 4, seed=2) == sample(axes, 4, seed=2)
+
+
+def test_decode_restores_constant_types():
+    axes = decode_axes(
+        {"TEETH_POWER_BOOST": [{"1": 1, "2": 2, "3": 3}], "MAX_HEALTH": [60]}
+    )
+
+    assert axes == {"TEETH_POWER_BOOST": [{1: 1, 2: 2, 3: 3}], "MAX_HEALTH": [60]}
+    assert decode([1, 1, 1, 0, 0], constants.MOVE_INFO["crawl"]) == (1, 1, 1, 0, 0)
+    try:
+        decode_axes({"MAX_HEALTH": ["60"]})
+    except TypeError:
+        return
+    assert False
+
+
+def test_key_covers_every_constant_used():
+    key = SweepPoint({}, 1_000).key()
+
+    assert key == SweepPoint({"MAX_HEALTH": constants.MAX_HEALTH}, 1_000).key()
+    assert key != SweepPoint({}, 1_000, chunk_size=500).key()
+    with patched({"MAX_LEGS": 2}):
+        assert key != SweepPoint({}, 1_000).key()
+
+
+def test_overrides_change_outcomes():
+    weak = {"CLAWS_POWER_MULTIPLIER": {1: 1, 2: 1, 3: 1}}
+    results = Sweep([{}, weak], 2_000, seed=5).run()
+
+    assert results[0][1] == run_point(SweepPoint({}, 2_000, 5))
+    assert results[1][1].predator_win_rate() < results[0][1].predator_win_rate()
+
+
+def test_sweep_reuses_cached_points(tmp_path):
+    cache = ResultCache(tmp_path)
+    axes = {"MAX_STAMINA": [300, 1500]}
+    first = Sweep(grid(axes), 1_000, seed=1, cache=cache)
+    first.run()
+
+    axes["MAX_STAMINA"].append(800)
+    second = Sweep(grid(axes), 1_000, seed=1, cache=cache)
+    results = second.run()
+
+    assert first.computed == 2 and second.computed == 1
+    assert [overrides for overrides, _ in results] == grid(axes)
+    assert results[0][1] == run_point(SweepPoint({"MAX_STAMINA": 300}, 1_000, 1))
+
+
+def test_sweep_in_parallel_matches_serial():
+    points = grid({"MAX_LEGS": [2, 8]})
+
+    serial = Sweep(points, 1_000, seed=3).run()
+    parallel = Sweep(points, 1_000, seed=3, workers=2).run()
+
+    assert serial == parallel
+
+
+if __name__ == "__main__":
+    main()
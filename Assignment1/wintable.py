@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+from argparse import ArgumentParser
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+
+import numpy as np
+from numpy.typing import NDArray
+
+from Assignment1 import constants
+from Assignment1.atomic import atomic_write
+from Assignment1.batch import (
+    BatchChase,
+    BatchGreedyMove,
+    CreatureBatch,
+    IntArray,
+    evolved_power,
+    resolve_fights,
+)
+from Assignment1.movement_info import MovementInfo
+
+FloatArray = NDArray[np.float64]
+
+
+def trait_range(low: int, high: int) -> IntArray:
+    return np.arange(low, high + 1, dtype=np.int64)
+
+
+@dataclass
+class Trajectories:
+    positions: IntArray
+    ticks: IntArray
+    breaks: IntArray
+
+    @classmethod
+    def greedy(
+        cls, move: BatchGreedyMove, staminas: IntArray, plan: int
+    ) -> Trajectories:
+        horizon = int(staminas.max())
+        position = np.zeros_like(staminas)
+        stamina = staminas.copy()
+        plans = np.full_like(staminas, plan)
+        positions = np.zeros((len(staminas), horizon + 1), dtype=np.int64)
+        ticks = np.zeros_like(staminas)
+        for tick in range(1, horizon + 1):
+            ticks += stamina > 0
+            move.move(position, stamina, plans)
+            positions[:, tick] = position
+
+        speed = np.diff(positions, axis=1)
+        changed = speed[:, 1:] != speed[:, :-1]
+        width = max(1, int(changed.sum(axis=1).max()))
+        breaks = np.ones((len(staminas), width), dtype=np.int64)
+        for row, columns in enumerate(changed):
+            found = np.flatnonzero(columns) + 1
+            breaks[row, : len(found)] = found
+        return cls(positions, ticks, breaks)
+
+
+# A greedy trajectory has constant speed between breaks, so the gap a
+# predator can close is maximal at a break of either side, the first tick or
+# the predator's last tick. The chase is caught iff that maximum reaches the
+# starting gap, which makes the catch rate over uniform prey positions exact.
+def catch_rates(hunter: Trajectories, runner: Trajectories) -> FloatArray:
+    rows = np.arange(len(runner.ticks))[None, :]
+    last = hunter.ticks[:, None]
+    candidates = [np.ones_like(last), last]
+    candidates += [
+        np.minimum(hunter.breaks[:, [k]], last) for k in range(hunter.breaks.shape[1])
+    ]
+    closest = np.full((len(hunter.ticks), len(runner.ticks)), -1, dtype=np.int64)
+    for tick in candidates:
+        ahead = np.take_along_axis(hunter.positions, tick, axis=1)
+        np.maximum(closest, ahead - runner.positions[rows, tick], out=closest)
+    for k in range(runner.breaks.shape[1]):
+        tick = np.minimum(runner.breaks[None, :, k], last)
+        ahead = np.take_along_axis(hunter.positions, tick, axis=1)
+        np.maximum(closest, ahead - runner.positions[rows, tick], out=closest)
+
+    positions = constants.MAX_POS - constants.MIN_POS + 1
+    reachable = np.clip(closest - constants.MIN_POS + 1, 0, positions)
+    rates: FloatArray = reachable.mean(axis=1) / positions
+    return rates
+
+
+def catch_table() -> FloatArray:
+    move = BatchGreedyMove(MovementInfo(constants.MOVE_INFO), constants.MOVEMENT_ORDER)
+    staminas = trait_range(constants.MIN_STAMINA, constants.MAX_STAMINA)
+    legs = trait_range(constants.MIN_LEGS, constants.MAX_LEGS)
+    wings = trait_range(constants.MIN_WINGS, constants.MAX_WINGS)
+    plans = move.body_plan(*np.meshgrid(legs, wings, indexing="ij"))
+    distinct, counts = np.unique(plans, return_counts=True)
+    trajectories = {
+        plan: Trajectories.greedy(move, staminas, plan) for plan in distinct.tolist()
+    }
+
+    rates = {}
+    for plan, hunter in trajectories.items():
+        rates[plan] = (
+            sum(
+                count * catch_rates(hunter, trajectories[other])
+                for other, count in zip(distinct.tolist(), counts.tolist())
+            )
+            / counts.sum()
+        )
+    table = np.empty((len(staminas), len(legs), len(wings)))
+    for i, plan in np.ndenumerate(plans):
+        table[:, i[0], i[1]] = rates[plan]
+    return table
+
+
+def fight_table() -> FloatArray:
+    claws = trait_range(constants.MIN_CLAW, constants.MAX_CLAW)
+    teeth = trait_range(constants.MIN_TEETH, constants.MAX_TEETH)
+    health = trait_range(constants.MIN_HEALTH, constants.MAX_HEALTH)
+    grid = np.meshgrid(claws, teeth, health, indexing="ij")
+    power = evolved_power(grid[0], grid[1]).ravel()
+    health_grid = grid[2].ravel()
+
+    predator_won, _ = resolve_fights(
+        health_grid[:, None], power[:, None], health_grid[None, :], power[None, :]
+    )
+    rates: FloatArray = predator_won.mean(axis=1).reshape(grid[0].shape)
+    return rates
+
+
+def origin() -> dict[str, int]:
+    return {
+        "stamina": constants.MIN_STAMINA,
+        "legs": constants.MIN_LEGS,
+        "wings": constants.MIN_WINGS,
+        "claws": constants.MIN_CLAW,
+        "teeth": constants.MIN_TEETH,
+        "health": constants.MIN_HEALTH,
+    }
+
+
+def write_array(path: Path, array: FloatArray) -> None:
+    with atomic_write(path) as file:
+        np.save(file, array.astype(np.float64, copy=False))
+
+
+def write_tables(directory: Path) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    write_array(directory / "catch.npy", catch_table())
+    write_array(directory / "fight.npy", fight_table())
+    (directory / "origin.json").write_text(json.dumps(origin()))
+
+
+# Prey traits are drawn independently, and the chase only depends on their
+# movement traits while the fight only depends on their combat traits. So a
+# predator's win rate against a random prey is the product of the two
+# marginals. Tables are opened read-only and memory-mapped, so processes
+# reading the same directory share the page cache instead of their heaps.
+@dataclass
+class WinTable:
+    catch: FloatArray
+    fight: FloatArray
+    origin: dict[str, int]
+
+    @classmethod
+    def open(cls, directory: Path) -> WinTable:
+        return cls(
+            np.load(directory / "catch.npy", mmap_mode="r"),
+            np.load(directory / "fight.npy", mmap_mode="r"),
+            json.loads((directory / "origin.json").read_text()),
+        )
+
+    def catch_rate(self, stamina: int, legs: int, wings: int) -> float:
+        o = self.origin
+        return float(
+            self.catch[stamina - o["stamina"], legs - o["legs"], wings - o["wings"]]
+        )
+
+    def fight_rate(self, claws: int, teeth: int, health: int) -> float:
+        o = self.origin
+        return float(
+            self.fight[claws - o["claws"], teeth - o["teeth"], health - o["health"]]
+        )
+
+    def win_rate(
+        self, stamina: int, legs: int, wings: int, claws: int, teeth: int, health: int
+    ) -> float:
+        return self.catch_rate(stamina, legs, wings) * self.fight_rate(
+            claws, teeth, health
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Precompute predator win-rate tables")
+    parser.add_argument("directory", help="where to write the memory-mapped tables")
+    args = parser.parse_args(argv)
+    write_tables(Path(args.directory))
+
+
+def test_catch_table_matches_exhaustive_chases(tmp_path):
+    from Assignment1.sweep import patched
+
+    small = {
+        "MIN_STAMINA": 50,
+        "MAX_STAMINA": 75,
+        "MAX_LEGS": 3,
+        "MAX_WINGS": 2,
+        "MAX_POS": 40,
+    }
+    with patched(small):
+        write_tables(tmp_path)
+        table = WinTable.open(tmp_path)
+        move = BatchGreedyMove(
+            MovementInfo(constants.MOVE_INFO), constants.MOVEMENT_ORDER
+        )
+        position, prey_stamina, prey_legs, prey_wings = (
+            a.ravel()
+            for a in np.meshgrid(
+                trait_range(constants.MIN_POS, constants.MAX_POS),
+                trait_range(constants.MIN_STAMINA, constants.MAX_STAMINA),
+                trait_range(constants.MIN_LEGS, constants.MAX_LEGS),
+                trait_range(constants.MIN_WINGS, constants.MAX_WINGS),
+            )
+        )
+        ones = np.ones_like(position)
+        prey = CreatureBatch(
+            position, prey_stamina, prey_legs, prey_wings, ones, ones, ones, ones
+        )
+        rng = Random(3)
+        for _ in range(12):
+            stamina = rng.randint(constants.MIN_STAMINA, constants.MAX_STAMINA)
+            legs = rng.randint(constants.MIN_LEGS, constants.MAX_LEGS)
+            wings = rng.randint(constants.MIN_WINGS, constants.MAX_WINGS)
+            predators = CreatureBatch(
+                *(np.full(len(prey), value) for value in (0, stamina, legs, wings)),
+                *(np.ones(len(prey), dtype=np.int64) for _ in range(4)),
+            )
+            outcome = BatchChase(predators, prey, move, move).chase()
+
+            assert np.isclose(
+                table.catch_rate(stamina, legs, wings), outcome.caught.mean()
+            )
+
+
+def test_fight_table_matches_resolve_fights():
+    table = fight_table()
+    claws, teeth, health = 2, 3, 70
+    grid = np.meshgrid(
+        trait_range(constants.MIN_CLAW, constants.MAX_CLAW),
+        trait_range(constants.MIN_TEETH, constants.MAX_TEETH),
+        trait_range(constants.MIN_HEALTH, constants.MAX_HEALTH),
+        indexing="ij",
+    )
+    prey_power = evolved_power(grid[0].ravel(), grid[1].ravel())
+    power = evolved_power(np.array([claws]), np.array([teeth]))
+    won, _ = resolve_fights(
+        np.full_like(prey_power, health),
+        np.full_like(prey_power, power[0]),
+        grid[2].ravel(),
+        prey_power,
+    )
+
+    index = (
+        claws - constants.MIN_CLAW,
+        teeth - constants.MIN_TEETH,
+        health - constants.MIN_HEALTH,
+    )
+    assert table[index] == won.mean()
+
+
+def test_win_table_is_memory_mapped(tmp_path):
+    from Assignment1.sweep import patched
+
+    small = {
+        "MIN_STAMINA": 50,
+        "MAX_STAMINA": 75,
+        "MAX_LEGS": 3,
+        "MAX_WINGS": 2,
+        "MAX_POS": 40,
+    }
+    with patched(small):
+        write_tables(tmp_path)
+    table = WinTable.open(tmp_path)
+
+    assert isinstance(table.catch, np.memmap) and isinstance(table.fight, np.memmap)
+    rate = table.win_rate(60, 2, 0, 3, 3, 100)
+    assert rate == table.catch_rate(60, 2, 0) * table.fight_rate(3, 3, 100)
+    assert 0 < rate < 1
+
+
+if __name__ == "__main__":
+    main()